@@ -1,23 +1,88 @@
-import httpx
+from typing import Dict, List
+from app.cache import MISSING, TTLCache
+from app.config import settings
 from app.consul_client import consul_client
+from app.clients.http_client import ServiceUnavailableError, http_client
 
 
 class CustomerClient:
+    def __init__(self):
+        # Customer lookups are cached, including short-lived negative entries
+        # for unknown ids, so repeat customers skip the round trip entirely.
+        self.cache = TTLCache(
+            maxsize=settings.customer_cache_size, ttl=settings.customer_cache_ttl
+        )
+
     async def get_customer(self, customer_id: int):
+        cached = self.cache.get(customer_id)
+        if cached is not MISSING:
+            return cached
+
         base_url = consul_client.get_service_url("customer-service")
         if not base_url:
-            raise Exception("Customer service unavailable")
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(f"{base_url}/customers/{customer_id}")
-                if response.status_code == 404:
-                    return None
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                print(f"Error fetching customer: {e}")
-                raise e
+            raise ServiceUnavailableError("Customer service unavailable")
+
+        try:
+            response = await http_client.request(
+                "GET",
+                base_url,
+                f"/customers/{customer_id}",
+                service="customer-service",
+            )
+            if response.status_code == 404:
+                self.cache.set(
+                    customer_id, None, ttl=settings.customer_cache_negative_ttl
+                )
+                return None
+            response.raise_for_status()
+            customer = response.json()
+            self.cache.set(customer_id, customer)
+            return customer
+        except Exception as e:
+            print(f"Error fetching customer: {e}")
+            raise e
+
+    async def get_customers(self, customer_ids: List[int]) -> Dict[int, dict]:
+        """
+        Look up several customers, keyed by id; unknown ids are left out.
+        Cached entries are served from memory and the rest are fetched with
+        a single POST /customers/batch request.
+        """
+        customers: Dict[int, dict] = {}
+        to_fetch: List[int] = []
+        for customer_id in dict.fromkeys(customer_ids):
+            cached = self.cache.get(customer_id)
+            if cached is MISSING:
+                to_fetch.append(customer_id)
+            elif cached is not None:
+                customers[customer_id] = cached
+        if not to_fetch:
+            return customers
+
+        base_url = consul_client.get_service_url("customer-service")
+        if not base_url:
+            raise ServiceUnavailableError("Customer service unavailable")
+
+        try:
+            response = await http_client.request(
+                "POST",
+                base_url,
+                "/customers/batch",
+                service="customer-service",
+                json={"ids": to_fetch},
+            )
+            response.raise_for_status()
+            body = response.json()
+        except Exception as e:
+            print(f"Error fetching customers: {e}")
+            raise e
+
+        for customer in body["customers"]:
+            self.cache.set(customer["id"], customer)
+            customers[customer["id"]] = customer
+        for customer_id in body["missing"]:
+            self.cache.set(customer_id, None, ttl=settings.customer_cache_negative_ttl)
+        return customers
 
 
 # Create global instance
@@ -0,0 +1,102 @@
+import httpx
+import time
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from typing import Optional
+from app.config import settings
+from app.load_balancer import load_balancer
+from app.metrics import DOWNSTREAM_ERRORS, DOWNSTREAM_LATENCY
+from app.tracing import tracer
+
+
+class ServiceUnavailableError(Exception):
+    """No instance of a downstream service is registered in Consul"""
+
+
+class HTTPClient:
+    """
+    Process-wide pooled HTTP client shared by all downstream service clients.
+    Reusing one httpx.AsyncClient keeps connections warm (keep-alive)
+    instead of opening a new TCP connection on every call.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.http_connect_timeout,
+                read=settings.http_read_timeout,
+                write=settings.http_write_timeout,
+                pool=settings.http_pool_timeout,
+            ),
+            http2=settings.http2,
+        )
+
+    def start(self):
+        """Create the shared client (called from the app lifespan)"""
+        if self._client is None:
+            self._client = self._build()
+
+    async def close(self):
+        """Close the shared client and its connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(
+        self, method: str, base_url: str, path: str, *, service: str, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request to one discovered instance of `service`, recording its
+        latency and in-flight count for the load balancer (5xx and errors are
+        penalized) and in the downstream metrics. The call runs in a client
+        span whose context is passed on in the `traceparent` header.
+        """
+        start = time.perf_counter()
+        try:
+            with tracer.start_as_current_span(
+                f"{method} {service}",
+                kind=SpanKind.CLIENT,
+                attributes={
+                    "http.request.method": method,
+                    "server.address": base_url,
+                    "url.path": path,
+                },
+            ) as span, load_balancer.track(base_url) as call:
+                headers = httpx.Headers(kwargs.pop("headers", None))
+                propagate.inject(headers)
+                response = await self.client.request(
+                    method, f"{base_url}{path}", headers=headers, **kwargs
+                )
+                call.failed = response.status_code >= 500
+                span.set_attribute("http.response.status_code", response.status_code)
+                if call.failed:
+                    span.set_status(Status(StatusCode.ERROR))
+        except Exception as e:
+            DOWNSTREAM_ERRORS.labels(service, type(e).__name__).inc()
+            raise
+        finally:
+            DOWNSTREAM_LATENCY.labels(service, method).observe(
+                time.perf_counter() - start
+            )
+        if call.failed:
+            DOWNSTREAM_ERRORS.labels(service, f"http_{response.status_code}").inc()
+        return response
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily when used outside the app lifespan (scripts, tests)
+        if self._client is None:
+            self.start()
+        return self._client
+
+
+# Create a global instance
+http_client = HTTPClient()
@@ -1,70 +1,190 @@
 import httpx
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.cache import MISSING, TTLCache
+from app.config import settings
 from app.consul_client import consul_client
+from app.clients.http_client import ServiceUnavailableError, http_client
+
+
+class StockReservationError(Exception):
+    """Inventory refused a reservation (unknown product or insufficient stock)"""
+
+
+@dataclass
+class CachedProduct:
+    """A product payload, its price tag and the time it was last validated"""
+
+    product: dict
+    validated_at: float
+
+    def is_fresh(self) -> bool:
+        age = time.monotonic() - self.validated_at
+        return age < settings.product_price_max_staleness
 
 
 class ProductsClient:
     """Client to communicate with the Inventory Service"""
 
-    async def get_product(self, product_id: int):
-        """Fetch product details by ID from Inventory Service"""
-        # 1. Discover the service URL dynamically from Consul
-        base_url = consul_client.get_service_url("inventory-service")
-        if not base_url:
-            raise Exception("❌ Inventory Service is unavailable (not found in Consul)")
+    def __init__(self):
+        # Product payloads used for pricing. Entries younger than the max
+        # staleness are served from memory; older ones are revalidated in
+        # bulk by their price_tag, which only changes with the price (not
+        # with stock). Stock changes never go through this cache.
+        self.price_cache = TTLCache(
+            maxsize=settings.product_cache_size, ttl=settings.product_cache_ttl
+        )
 
-        # 2. Make the Async HTTP Request
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(f"{base_url}/products/{product_id}")
+    def _cache_product(self, product: dict):
+        self.price_cache.set(product["id"], CachedProduct(product, time.monotonic()))
 
-                if response.status_code == 404:
-                    return None
+    async def get_product(self, product_id: int):
+        """Fetch product details by ID from Inventory Service (cached for pricing)"""
+        return (await self.get_products([product_id])).get(product_id)
 
-                # Raise an exception for 500 errors or connection issues
-                response.raise_for_status()
-                return response.json()
+    async def get_products(self, product_ids: List[int]) -> Dict[int, dict]:
+        """
+        Fetch several products for pricing.
+        Fresh cache entries are served from memory; stale and unknown ids
+        are resolved together with a single POST /products/batch/revalidate,
+        which only sends back the products whose price tag changed.
+        Returns a {product_id: product} mapping; ids unknown to the
+        Inventory Service are absent from the result.
+        """
+        products: Dict[int, dict] = {}
+        known: Dict[int, Optional[str]] = {}
+
+        # Collapse duplicates while keeping the first-seen order
+        for product_id in dict.fromkeys(product_ids):
+            cached = self.price_cache.get(product_id)
+            if cached is MISSING:
+                known[product_id] = None
+            elif cached.is_fresh():
+                products[product_id] = cached.product
+            else:
+                known[product_id] = cached.product.get("price_tag")
+
+        products.update(await self._revalidate(known))
+        return products
+
+    async def _revalidate(self, known: Dict[int, Optional[str]]) -> Dict[int, dict]:
+        """Resolve {product_id: held price tag or None} in one request"""
+        if not known:
+            return {}
 
-            except httpx.RequestError as e:
-                print(f"❌ Error connecting to Inventory Service: {e}")
-                raise e
+        base_url = consul_client.get_service_url("inventory-service")
+        if not base_url:
+            raise ServiceUnavailableError(
+                "❌ Inventory Service is unavailable (not found in Consul)"
+            )
+
+        try:
+            response = await http_client.request(
+                "POST",
+                base_url,
+                "/products/batch/revalidate",
+                service="inventory-service",
+                json={"known": known},
+            )
+            response.raise_for_status()
+            body = response.json()
+        except httpx.RequestError as e:
+            print(f"❌ Error connecting to Inventory Service: {e}")
+            raise e
+
+        products: Dict[int, dict] = {}
+        evicted: Dict[int, Optional[str]] = {}
+        for product in body["changed"]:
+            self._cache_product(product)
+            products[product["id"]] = product
+        for product_id in body["unchanged"]:
+            cached = self.price_cache.get(product_id)
+            if cached is MISSING:
+                evicted[product_id] = None  # Dropped meanwhile: fetch it again
+            else:
+                self._cache_product(cached.product)
+                products[product_id] = cached.product
+        for product_id in body["missing"]:
+            self.price_cache.delete(product_id)
+
+        products.update(await self._revalidate(evicted))
+        return products
+
+    async def reserve_stock(self, items: List[Tuple[int, int]]):
+        """
+        Atomically decrease stock for several products in one request.
+        Calls POST /products/stock/reserve with (product_id, quantity) pairs;
+        the Inventory Service applies all of them or none.
+        """
+        if not items:
+            return []
 
-    async def decrease_stock(self, product_id: int, quantity: int):
+        base_url = consul_client.get_service_url("inventory-service")
+        if not base_url:
+            raise ServiceUnavailableError("❌ Inventory Service is unavailable")
+
+        payload = {
+            "items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in items
+            ]
+        }
+
+        try:
+            response = await http_client.request(
+                "POST",
+                base_url,
+                "/products/stock/reserve",
+                service="inventory-service",
+                json=payload,
+            )
+
+            if response.status_code in (400, 404):
+                # Unknown product or insufficient stock; nothing was applied
+                error_detail = response.json().get("detail", "Unknown error")
+                raise StockReservationError(f"Stock reservation failed: {error_detail}")
+
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.RequestError as e:
+            print(f"❌ Failed to reserve stock: {e}")
+            raise e
+
+    async def release_stock(self, items: List[Tuple[int, int]]):
         """
-        Decrease product stock by the given quantity.
-        Calls PATCH /products/{id}/stock?quantity_delta=-{quantity}
+        Give back stock taken by an earlier reservation (compensation).
+        Calls POST /products/stock/release with (product_id, quantity) pairs.
         """
+        if not items:
+            return []
+
         base_url = consul_client.get_service_url("inventory-service")
         if not base_url:
-            raise Exception("❌ Inventory Service is unavailable")
-
-        # We are selling items, so we subtract from the stock (negative delta)
-        quantity_delta = -quantity
-
-        async with httpx.AsyncClient() as client:
-            try:
-                # We assume the Inventory Service uses a query parameter for the delta
-                # based on standard FastAPI default behavior for simple arguments
-                response = await client.patch(
-                    f"{base_url}/products/{product_id}/stock",
-                    params={"quantity_delta": quantity_delta},
-                )
-
-                if response.status_code == 404:
-                    raise Exception(
-                        f"Product {product_id} not found during stock update"
-                    )
-
-                if response.status_code == 400:
-                    # Likely insufficient stock
-                    error_detail = response.json().get("detail", "Unknown error")
-                    raise Exception(f"Stock update failed: {error_detail}")
-
-                response.raise_for_status()
-                return response.json()
-
-            except httpx.RequestError as e:
-                print(f"❌ Failed to update stock for product {product_id}: {e}")
-                raise e
+            raise ServiceUnavailableError("❌ Inventory Service is unavailable")
+
+        payload = {
+            "items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in items
+            ]
+        }
+
+        try:
+            response = await http_client.request(
+                "POST",
+                base_url,
+                "/products/stock/release",
+                service="inventory-service",
+                json=payload,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        except httpx.RequestError as e:
+            print(f"❌ Failed to release stock: {e}")
+            raise e
 
 
 # Create a global instance
@@ -0,0 +1,18 @@
+import asyncio
+from typing import Awaitable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: int) -> List[T]:
+    """
+    Run awaitables concurrently with at most `limit` of them in flight.
+    Results are returned in input order; the first exception is propagated.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
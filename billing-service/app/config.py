@@ -6,6 +6,13 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # Connection pool (ignored for SQLite). Keep replicas x (pool size +
+    # overflow) below Postgres max_connections
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced (-1 = never)
+    db_pool_timeout: float = 30.0  # Max wait for a free connection
+    db_pool_pre_ping: bool = True  # Test each connection on checkout
 
     # Service
     service_name: str = "billing-service"
@@ -15,6 +22,63 @@ class Settings(BaseSettings):
     # Consul
     consul_host: str = "consul"
     consul_port: int = 8500
+    # Service discovery cache
+    consul_watch_wait: str = "30s"  # Max duration of one blocking query
+    consul_cache_ttl: float = 90.0  # Restart a watch whose data is older than this
+    consul_retry_interval: float = 2.0  # Pause after a failed Consul query
+    consul_watch_min_interval: float = 0.5  # Min time between two blocking queries
+    consul_initial_sync_timeout: float = 5.0  # Startup wait for the first snapshot
+    # Load balancing (power-of-two-choices on latency EWMA x in-flight calls)
+    lb_ewma_alpha: float = 0.3  # Weight of the newest latency sample
+    lb_error_penalty: float = 1.0  # Seconds recorded for a failed call
+
+    # Downstream calls
+    # Max concurrent calls when fanning out to other services (1 = sequential)
+    fanout_concurrency: int = 10
+
+    # Customer validation cache (in-process LRU with TTL)
+    customer_cache_size: int = 10000
+    customer_cache_ttl: float = 60.0
+    customer_cache_negative_ttl: float = 5.0  # For customers that were not found
+
+    # Product price cache (payloads revalidated with ETags once stale)
+    product_cache_size: int = 10000
+    product_cache_ttl: float = 3600.0  # How long payloads and price tags are kept
+    product_price_max_staleness: float = 30.0  # Serve prices this old without asking
+
+    # HTTP client (one pooled connection pool shared by all downstream calls)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    http_connect_timeout: float = 2.0
+    http_read_timeout: float = 5.0
+    http_write_timeout: float = 5.0
+    http_pool_timeout: float = 2.0  # Max wait for a free pooled connection
+    http2: bool = False  # Requires the optional `h2` package (httpx[http2])
+
+    # Bill export (bills fetched per server-side cursor chunk)
+    export_chunk_size: int = 500
+
+    # Idempotency-Key handling for POST /bills
+    idempotency_key_ttl: float = 86400.0  # How long stored responses are replayed
+    idempotency_wait_timeout: float = 10.0  # Max wait for an in-flight duplicate
+    idempotency_poll_interval: float = 0.05
+    idempotency_lock_timeout: float = 60.0  # Take over claims abandoned this long
+
+    # Outbox worker for POST /bills?mode=async
+    outbox_batch_size: int = 50  # Pending bills reserved per inventory call
+    outbox_poll_interval: float = 1.0  # Idle wait between outbox scans
+    outbox_max_attempts: int = 8  # Failed attempts before a bill is marked failed
+    # Delay before retrying a failed event, doubled on every further failure
+    # (5s, 10s, 20s... capped): 8 attempts ride out ~10 minutes of outage
+    outbox_retry_backoff: float = 5.0
+    outbox_retry_backoff_max: float = 300.0
+
+    # Tracing (OpenTelemetry): "none", "file" (JSON lines) or "otlp" (HTTP)
+    tracing_exporter: str = "none"
+    tracing_file: str = "traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_max_statement_length: int = 1000  # SQL text kept on DB spans
 
     # Application
     environment: str = "development"
@@ -1,6 +1,11 @@
 import consul
-import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
 from app.config import settings
+from app.load_balancer import load_balancer
+from app.metrics import DISCOVERY_ERRORS, DISCOVERY_INSTANCES, DISCOVERY_MISSES
+from app.tracing import tracer
 
 
 class ConsulClient:
@@ -12,6 +17,15 @@ class ConsulClient:
         )
         self.service_id = f"{settings.service_name}-{settings.service_port}"
 
+        # Discovery cache: service name -> last known healthy instance base URLs.
+        # Kept up to date by background watch threads, read on the hot path.
+        self._instances: Dict[str, List[str]] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._loaded: Dict[str, threading.Event] = {}
+        self._watchers: Dict[str, threading.Event] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
     def register_service(self):
         """Register this service with Consul"""
         try:
@@ -47,31 +61,159 @@ class ConsulClient:
         except Exception as e:
             print(f"❌ Failed to deregister service: {e}")
 
-    def get_service_url(self, service_name: str) -> str:
+    def watch_services(
+        self, service_names: Iterable[str], timeout: Optional[float] = None
+    ):
         """
-        Discover a healthy service instance from Consul.
-        Returns the base URL (e.g., 'http://172.18.0.4:8081')
+        Start background watches for the given services and wait (up to
+        `timeout` seconds) for each of them to load its first instance list.
         """
-        try:
-            # catalog.service returns a tuple: (index, nodes)
-            _, nodes = self.consul.catalog.service(service_name)
+        service_names = list(service_names)
+        for service_name in service_names:
+            self._ensure_watch(service_name)
+        for service_name in service_names:
+            self._loaded[service_name].wait(timeout)
 
-            if not nodes:
-                print(f"⚠️ No instances found for service: {service_name}")
-                return None
+    def stop_watching(self):
+        """Stop all background watches (in-flight blocking queries are abandoned)"""
+        with self._lock:
+            for stop in self._watchers.values():
+                stop.set()
+            self._watchers.clear()
+            self._threads.clear()
 
-            # Simple Load Balancing: Choose a random instance
-            service = random.choice(nodes)
+    def get_service_url(self, service_name: str) -> Optional[str]:
+        """
+        Pick a healthy service instance from the in-memory discovery cache.
+        Returns the base URL (e.g., 'http://172.18.0.4:8081').
+        Never calls Consul: if Consul is unreachable, the last known
+        instance list keeps being served.
+        """
+        with tracer.start_as_current_span(
+            "discovery", attributes={"peer.service": service_name}
+        ) as span:
+            base_url = self._pick_instance(service_name)
+            if base_url:
+                span.set_attribute("server.address", base_url)
+            return base_url
 
-            # Prefer ServiceAddress, fall back to node Address if ServiceAddress is empty
-            address = service.get("ServiceAddress") or service.get("Address")
-            port = service.get("ServicePort")
+    def _pick_instance(self, service_name: str) -> Optional[str]:
+        self._ensure_watch(service_name)
 
-            return f"http://{address}:{port}"
+        with self._lock:
+            instances = self._instances.get(service_name)
 
-        except Exception as e:
-            print(f"❌ Failed to discover service {service_name}: {e}")
+        if instances is None:
+            print(f"⚠️ No discovery data yet for service: {service_name}")
+            DISCOVERY_MISSES.labels(service_name).inc()
+            return None
+
+        if not instances:
+            DISCOVERY_MISSES.labels(service_name).inc()
+            print(f"⚠️ No instances found for service: {service_name}")
+            return None
+
+        # Power-of-two-choices on latency EWMA and in-flight calls
+        return load_balancer.choose(instances)
+
+    def _ensure_watch(self, service_name: str):
+        """Start a watch if none is running, or replace one that went stale"""
+        with self._lock:
+            thread = self._threads.get(service_name)
+            refreshed_at = self._refreshed_at.get(service_name)
+            stale = (
+                refreshed_at is not None
+                and time.monotonic() - refreshed_at > settings.consul_cache_ttl
+            )
+            if thread is not None and thread.is_alive() and not stale:
+                return
+
+            if stale:
+                # TTL fallback: blocking queries return at least every
+                # `consul_watch_wait`, so data this old means the watch is stuck.
+                print(f"⚠️ Discovery data for {service_name} is stale, restarting watch")
+                self._refreshed_at[service_name] = time.monotonic()
+
+            previous = self._watchers.get(service_name)
+            if previous is not None:
+                previous.set()
+
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=self._watch,
+                args=(service_name, stop),
+                name=f"consul-watch-{service_name}",
+                daemon=True,
+            )
+            self._loaded.setdefault(service_name, threading.Event())
+            self._watchers[service_name] = stop
+            self._threads[service_name] = thread
+            thread.start()
+
+    def _watch(self, service_name: str, stop: threading.Event):
+        """Keep the cache for one service current using Consul blocking queries"""
+        index = None
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                # health.service returns a tuple: (index, entries). passing=True
+                # keeps only instances whose checks pass. With an index, Consul
+                # holds the request open until the list changes or `wait`.
+                new_index, entries = self.consul.health.service(
+                    service_name,
+                    index=index,
+                    wait=settings.consul_watch_wait,
+                    passing=True,
+                )
+            except Exception as e:
+                print(f"❌ Failed to discover service {service_name}: {e}")
+                DISCOVERY_ERRORS.labels(service_name).inc()
+                index = None
+                stop.wait(settings.consul_retry_interval)
+                continue
+
+            if stop.is_set():
+                break
+            self._store(service_name, entries or [])
+            index = self._next_index(index, new_index)
+
+            # A query can return at once (index reset, agent errors without
+            # an exception); rate limit so the watch never spins on Consul
+            elapsed = time.monotonic() - started
+            stop.wait(max(0.0, settings.consul_watch_min_interval - elapsed))
+
+    @staticmethod
+    def _next_index(previous: Optional[str], returned: Optional[str]) -> Optional[str]:
+        """
+        Index for the next blocking query. Consul's blocking-query docs ask
+        clients to start over (no index) when the index goes backwards or is
+        not positive, or the next query would return immediately again.
+        """
+        try:
+            returned_value = int(returned)
+        except (TypeError, ValueError):
+            return None
+        if returned_value <= 0:
             return None
+        if previous is not None and returned_value < int(previous):
+            return None
+        return returned
+
+    def _store(self, service_name: str, entries: List[dict]):
+        instances = []
+        for entry in entries:
+            service = entry.get("Service", {})
+            node = entry.get("Node", {})
+            # Prefer the service Address, fall back to node Address if it is empty
+            address = service.get("Address") or node.get("Address")
+            port = service.get("Port")
+            instances.append(f"http://{address}:{port}")
+
+        with self._lock:
+            self._instances[service_name] = instances
+            self._refreshed_at[service_name] = time.monotonic()
+            self._loaded.setdefault(service_name, threading.Event()).set()
+        DISCOVERY_INSTANCES.labels(service_name).set(len(instances))
 
 
 # Create a global instance
@@ -1,20 +1,87 @@
-from sqlmodel import create_engine, Session, SQLModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config import settings
+from app.db_metrics import pool_metrics
+from app.metrics import instrument_engine
+from app.tracing import trace_engine
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
+
+def async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver (asyncpg / aiosqlite)"""
+    for prefix, driver in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+def pool_options(url: str) -> dict:
+    """Connection pool options from settings (SQLite keeps its default pool)"""
+    # Pre-ping tests each connection on checkout (one extra round trip);
+    # with it disabled, db_pool_recycle alone retires stale connections
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_timeout=settings.db_pool_timeout,
+            # Times each checkout into pool_metrics (/metrics/db)
+            poolclass=pool_metrics.pool_class(),
+        )
+    return options
+
+
+# Create async database engine
+engine = create_async_engine(
+    async_database_url(settings.database_url),
     echo=True if settings.environment == "development" else False,  # Log SQL queries in dev
-    pool_pre_ping=True,  # Verify connections before using them
+    **pool_options(settings.database_url),
 )
+instrument_engine(engine)
+pool_metrics.instrument(engine)
+trace_engine(engine)
+
+
+# create_all only creates missing tables. Columns and indexes added to
+# existing tables since they were first created are applied here, so older
+# Postgres databases are upgraded in place (every statement is idempotent).
+SCHEMA_UPGRADES = [
+    # Keyset pagination of GET /bills
+    "CREATE INDEX IF NOT EXISTS ix_bill_bill_date_id ON bill (bill_date, id)",
+    # Async submissions (?mode=async); existing bills are completed ones
+    "ALTER TABLE bill ADD COLUMN IF NOT EXISTS status VARCHAR(20) "
+    "NOT NULL DEFAULT 'completed'",
+    "ALTER TABLE bill ADD COLUMN IF NOT EXISTS failure_reason VARCHAR",
+    # Outbox retry backoff
+    "ALTER TABLE outboxevent ADD COLUMN IF NOT EXISTS next_attempt_at "
+    "TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()",
+]
+
+
+async def create_db_and_tables():
+    """Create all tables in the database and upgrade existing ones"""
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
 
 
-def create_db_and_tables():
-    """Create all tables in the database"""
-    SQLModel.metadata.create_all(engine)
+async def get_session():
+    """Dependency function to get an async database session"""
+    # expire_on_commit=False keeps committed objects readable without
+    # issuing implicit (blocking) refresh queries
+    # The connection is checked out lazily, on the session's first statement
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
 
 
-def get_session():
-    """Dependency function to get database session"""
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+def db_metrics():
+    """Pool occupancy and checkout timings for the /metrics/db endpoint"""
+    return pool_metrics.snapshot(engine.pool)
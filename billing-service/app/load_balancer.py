@@ -0,0 +1,92 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List
+from app.config import settings
+
+
+@dataclass
+class InstanceStats:
+    """Latency EWMA (seconds) and in-flight request count for one instance"""
+
+    ewma: float = 0.0
+    in_flight: int = 0
+    samples: int = 0
+
+
+class CallRecord:
+    """Handle yielded by `LoadBalancer.track`; set `failed` to penalize the call"""
+
+    def __init__(self):
+        self.failed = False
+
+
+class LoadBalancer:
+    """
+    Power-of-two-choices load balancer.
+    Two random instances are compared and the one with the lower
+    latency EWMA weighted by its in-flight requests wins, so slow or
+    overloaded replicas automatically receive less traffic.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, InstanceStats] = {}
+        self._lock = threading.Lock()
+
+    def choose(self, instances: List[str]) -> str:
+        """Pick one instance base URL out of the healthy ones"""
+        if len(instances) == 1:
+            return instances[0]
+
+        first, second = random.sample(instances, 2)
+        with self._lock:
+            return first if self._score(first) <= self._score(second) else second
+
+    def _score(self, instance: str) -> float:
+        stats = self._stats.get(instance)
+        if stats is None:
+            return 0.0
+        # The small constant keeps in-flight counts meaningful for instances
+        # that have not reported any latency yet.
+        return (stats.ewma + 0.001) * (stats.in_flight + 1)
+
+    @contextmanager
+    def track(self, instance: str):
+        """Record in-flight state and latency for one call to `instance`"""
+        record = CallRecord()
+        with self._lock:
+            self._stats.setdefault(instance, InstanceStats()).in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.failed = True
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            if record.failed:
+                latency = max(latency, settings.lb_error_penalty)
+            self._record(instance, latency)
+
+    def _record(self, instance: str, latency: float):
+        with self._lock:
+            stats = self._stats.setdefault(instance, InstanceStats())
+            stats.in_flight = max(0, stats.in_flight - 1)
+            if stats.samples == 0:
+                stats.ewma = latency
+            else:
+                alpha = settings.lb_ewma_alpha
+                stats.ewma = alpha * latency + (1 - alpha) * stats.ewma
+            stats.samples += 1
+
+    def stats(self, instance: str) -> InstanceStats:
+        """Snapshot of the stats recorded for an instance"""
+        with self._lock:
+            stats = self._stats.get(instance, InstanceStats())
+            return InstanceStats(stats.ewma, stats.in_flight, stats.samples)
+
+
+# Create a global instance
+load_balancer = LoadBalancer()
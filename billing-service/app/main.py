@@ -1,8 +1,13 @@
+import asyncio
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, db_metrics
+from app.metrics import PrometheusMiddleware, metrics_response
+from app.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from app.consul_client import consul_client
+from app.clients.http_client import http_client
+from app.services.outbox_worker import outbox_worker
 from app.routers import bills
 from app.config import settings
 
@@ -12,12 +17,25 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     print("🚀 Starting Billing Service...")
-    create_db_and_tables()
+    setup_tracing()
+    await create_db_and_tables()
     consul_client.register_service()
+    # Warm the discovery cache in a worker thread so the loop is never blocked
+    await asyncio.to_thread(
+        consul_client.watch_services,
+        ["customer-service", "inventory-service"],
+        settings.consul_initial_sync_timeout,
+    )
+    http_client.start()
+    outbox_worker.start()
     yield
     # Shutdown
     print("🛑 Shutting down Billing Service...")
+    await outbox_worker.stop()
+    await http_client.close()
+    consul_client.stop_watching()
     consul_client.deregister_service()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -27,6 +45,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Per-route latency, status and in-flight metrics (served at /metrics)
+app.add_middleware(PrometheusMiddleware)
+# Server span per request, continuing the caller's trace (W3C traceparent)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 # Note: bills.router usually has prefix="/bills", so this makes it /api/bills
 app.include_router(bills.router, prefix="/api")
@@ -38,6 +61,18 @@ def health_check():
     return {"status": "healthy", "service": settings.service_name}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
+
+@app.get("/metrics/db")
+def database_metrics():
+    """Connection pool occupancy, checkout latency and wait time"""
+    return db_metrics()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
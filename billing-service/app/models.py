@@ -1,6 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -26,8 +27,15 @@ class BillBase(SQLModel):
 
 
 class Bill(BillBase, table=True):
+    # Supports keyset pagination ordered by (bill_date, id)
+    __table_args__ = (Index("ix_bill_bill_date_id", "bill_date", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     total_amount: Decimal = Field(default=0.0, decimal_places=2)
+    # "pending" while an async submission waits for the outbox worker,
+    # then "completed" or "failed" (with the reason)
+    status: str = Field(default="completed", max_length=20)
+    failure_reason: Optional[str] = None
 
     items: List["BillItem"] = Relationship(back_populates="bill")
 
@@ -46,4 +54,63 @@ class BillCreate(SQLModel):
 class BillRead(BillBase):
     id: int
     total_amount: Decimal
+    status: str
+    failure_reason: Optional[str] = None
     items: List[BillItem]
+
+
+class BillBatchCreate(SQLModel):
+    bills: List[BillCreate] = Field(min_length=1, max_length=1000)
+
+
+class BillBatchResult(SQLModel):
+    """Outcome of one payload of a batch, reported at its position"""
+
+    index: int
+    status: str  # "created" or "failed"
+    bill: Optional[BillRead] = None
+    error: Optional[str] = None
+
+
+class BillBatchResponse(SQLModel):
+    created: int
+    failed: int
+    results: List[BillBatchResult]
+
+
+class BillSubmitted(SQLModel):
+    """202 response of an async submission"""
+
+    id: int
+    status: str
+    status_url: str
+
+
+# --- Transactional outbox ---
+class OutboxEvent(SQLModel, table=True):
+    """Work recorded in the same transaction as a pending bill"""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    bill_id: int = Field(foreign_key="bill.id")
+    event_type: str = Field(default="bill.submitted", max_length=50)
+    status: str = Field(default="pending", max_length=20, index=True)
+    attempts: int = 0
+    last_error: Optional[str] = None
+    # Failed events are retried with exponential backoff from this time on
+    next_attempt_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now)
+    processed_at: Optional[datetime] = None
+
+
+# --- Idempotency ---
+class IdempotencyKey(SQLModel, table=True):
+    """Outcome of a POST /bills call, stored under its Idempotency-Key header"""
+
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str  # Retries must send the same payload
+    bill_id: Optional[int] = Field(default=None, foreign_key="bill.id")
+    # Both stay empty while the first request is still in flight
+    status_code: Optional[int] = None
+    response_body: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    expires_at: datetime
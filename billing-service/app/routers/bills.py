@@ -1,30 +1,188 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlmodel import Session
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.database import get_session
-from app.models import BillRead, BillCreate
+from app.models import (
+    BillBatchCreate,
+    BillBatchResponse,
+    BillBatchResult,
+    BillCreate,
+    BillRead,
+    BillSubmitted,
+)
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
 from app.services.billing_service import BillingService
+from app.services.idempotency_service import IdempotencyService
+from app.services.outbox_worker import outbox_worker
 
 router = APIRouter(prefix="/bills", tags=["bills"])
 
 @router.get("", response_model=List[BillRead])
-def list_bills(
-    skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_bills(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
 ):
-    """List bills with pagination"""
+    """
+    List bills with pagination.
+    When a page is full, its X-Next-Cursor header can be passed back as
+    `cursor` to fetch the next one (`skip` is still supported).
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, bill_date=datetime.fromisoformat, id=int)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    service = BillingService(session)
+    bills = await service.list_bills(skip=skip, limit=limit, after=after)
+    if bills and len(bills) == limit:
+        last = bills[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            {"bill_date": last.bill_date.isoformat(), "id": last.id}
+        )
+    return bills
+
+@router.get("/export")
+async def export_bills(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    customer_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Stream all bills (with their items) as NDJSON or CSV.
+    Optional filters: bill_date in [start, end) and customer_id.
+    """
     service = BillingService(session)
-    return service.list_bills(skip=skip, limit=limit)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        service.export_bills(export_format, start=start, end=end, customer_id=customer_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="bills.{export_format}"'},
+    )
+
+
+@router.post(
+    "",
+    response_model=BillRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": BillSubmitted}},
+)
+async def create_bill(
+    bill_data: BillCreate,
+    request: Request,
+    mode: Literal["sync", "async"] = "sync",
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Create a bill.
+    With `mode=async` the bill is only recorded as pending and a 202 with its
+    status URL is returned; the outbox worker settles it in the background.
+    With an Idempotency-Key header, a retry of the same request replays the
+    stored response instead of billing (and reserving stock) again.
+    """
+    service = BillingService(session)
+    idempotency = IdempotencyService(session) if idempotency_key else None
+    if idempotency:
+        stored = await idempotency.claim(
+            idempotency_key, IdempotencyService.fingerprint(bill_data, mode)
+        )
+        if stored:
+            return Response(
+                content=stored.response_body,
+                status_code=stored.status_code,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"},
+            )
 
-@router.post("", response_model=BillRead, status_code=status.HTTP_201_CREATED)
-async def create_bill(bill_data: BillCreate, session: Session = Depends(get_session)):
+    response: Optional[Response] = None
+
+    async def before_commit(bill):
+        # The stored response is committed in the bill's own transaction
+        nonlocal response
+        response = _bill_response(request, mode, bill)
+        if idempotency:
+            await idempotency.complete(
+                idempotency_key, bill.id, response.status_code, response.body.decode()
+            )
+
+    try:
+        if mode == "async":
+            await service.submit_bill(bill_data, before_commit=before_commit)
+        else:
+            await service.create_bill(bill_data, before_commit=before_commit)
+    except Exception:
+        if idempotency:
+            await idempotency.release(idempotency_key)
+        raise
+
+    if mode == "async":
+        outbox_worker.notify()
+    return response
+
+
+def _bill_response(request: Request, mode: str, bill) -> Response:
+    if mode == "async":
+        status_url = request.app.url_path_for("get_bill", bill_id=bill.id)
+        return Response(
+            content=BillSubmitted(
+                id=bill.id, status=bill.status, status_url=status_url
+            ).model_dump_json(),
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/json",
+            headers={"Location": status_url},
+        )
+    return Response(
+        content=BillRead.model_validate(bill).model_dump_json(),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json",
+    )
+
+
+@router.post("/batch", response_model=BillBatchResponse)
+async def create_bills(
+    batch: BillBatchCreate, session: AsyncSession = Depends(get_session)
+):
+    """
+    Create many bills in one call (e.g. bulk imports).
+    Each payload succeeds or fails on its own; results are reported in
+    request order.
+    """
     service = BillingService(session)
-    return await service.create_bill(bill_data)
+    bills = await service.create_bills(batch.bills)
+    results = [
+        BillBatchResult(index=index, status="created", bill=bill)
+        if bill.status == "completed"
+        else BillBatchResult(index=index, status="failed", error=bill.failure_reason)
+        for index, bill in enumerate(bills)
+    ]
+    created = sum(result.status == "created" for result in results)
+    return BillBatchResponse(
+        created=created, failed=len(results) - created, results=results
+    )
 
 
 @router.get("/{bill_id}", response_model=BillRead)
-def get_bill(bill_id: int, session: Session = Depends(get_session)):
+async def get_bill(bill_id: int, session: AsyncSession = Depends(get_session)):
     service = BillingService(session)
-    bill = service.get_bill(bill_id)
+    bill = await service.get_bill(bill_id)
 
     if not bill:
         raise HTTPException(
@@ -1,85 +1,106 @@
+import csv
+import io
+import httpx
+from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
-from sqlmodel import Session, select
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 
-from app.models import Bill, BillItem, BillCreate
+from app.config import settings
+from app.concurrency import gather_bounded
+from app.models import Bill, BillItem, BillCreate, BillRead, OutboxEvent
+from app.tracing import tracer
 
 # We import the global client instances we created
 from app.clients.customer_client import customer_client
-from app.clients.products_client import products_client
+from app.clients.http_client import ServiceUnavailableError
+from app.clients.products_client import StockReservationError, products_client
 
 
 class BillingService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create_bill(self, bill_data: BillCreate) -> Bill:
+    @tracer.start_as_current_span("create_bill")
+    async def create_bill(
+        self,
+        bill_data: BillCreate,
+        before_commit: Optional[Callable[[Bill], Awaitable[None]]] = None,
+    ) -> Bill:
         """
         Create a new bill. This involves:
-        1. Verifying customer exists.
-        2. Verifying products exist and getting current prices.
-        3. Decrementing stock for each product.
-        4. Calculating totals and saving to DB.
+        1. Verifying customer exists and products exist (getting current prices).
+        2. Reserving stock for all products in one atomic request.
+        3. Calculating totals.
+        4. Saving to DB. `before_commit` gets the flushed bill and can write
+           more rows in the same transaction. If saving fails, the reserved
+           stock is released.
+
+        Downstream calls are fanned out, bounded by `settings.fanout_concurrency`.
+        Each step runs in its own span ("create_bill.<step>").
         """
 
-        # --- Step 1: Validate Customer ---
-        customer = await customer_client.get_customer(bill_data.customer_id)
+        # --- Step 1: Validate Customer & Fetch Products (concurrently) ---
+        # The customer check and the product lookup are independent, so we run
+        # them side by side. All products are priced with a single batch request;
+        # duplicate product ids collapse into one lookup inside the client.
+        with tracer.start_as_current_span("create_bill.validate"):
+            customer, products = await gather_bounded(
+                [
+                    customer_client.get_customer(bill_data.customer_id),
+                    products_client.get_products(
+                        [item_data.product_id for item_data in bill_data.items]
+                    ),
+                ],
+                limit=settings.fanout_concurrency,
+            )
         if not customer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Customer with ID {bill_data.customer_id} not found",
             )
 
-        # --- Step 2: Process Items & Calculate Totals ---
-        bill_items: List[BillItem] = []
-        total_amount = Decimal("0.00")
-
         for item_data in bill_data.items:
-            # A. Get Product Details (to get the real price)
-            product = await products_client.get_product(item_data.product_id)
-            if not product:
+            if item_data.product_id not in products:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Product with ID {item_data.product_id} not found",
                 )
 
-            # B. Check if sufficient stock is available (Optional, usually handled by inventory service error)
-            # But we will rely on the decrease_stock call to fail if stock is low.
-
-            # C. Decrease Stock in Inventory Service
-            # This is a critical side effect. If this fails (e.g. insufficient stock),
-            # the whole bill creation should fail.
-            try:
-                await products_client.decrease_stock(
-                    item_data.product_id, item_data.quantity
-                )
-            except Exception as e:
-                # If stock update fails, we stop everything.
-                # Note: In a real production app, you might need a "Saga" pattern to rollback
-                # previous items if the 3rd item fails. For this workshop, we abort.
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to update stock for product {item_data.product_id}: {str(e)}",
-                )
-
-            # D. Prepare Bill Item
-            # We trust the price from the Inventory Service, not the user input
-            price = Decimal(str(product["price"]))
-            quantity = item_data.quantity
-            sub_total = price * quantity
-
-            bill_item = BillItem(
-                product_id=item_data.product_id,
-                quantity=quantity,
-                price=price,
-                sub_total=sub_total,
+        # --- Step 2: Reserve Stock in Inventory Service ---
+        # This is a critical side effect. All lines are reserved in one atomic
+        # request, so if any of them fails (e.g. insufficient stock) nothing is
+        # decremented and the whole bill creation fails.
+        lines = [
+            (item_data.product_id, item_data.quantity) for item_data in bill_data.items
+        ]
+        try:
+            with tracer.start_as_current_span("create_bill.reserve_stock"):
+                await products_client.reserve_stock(lines)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to reserve stock: {str(e)}",
             )
 
-            bill_items.append(bill_item)
-            total_amount += sub_total
+        # --- Step 3: Calculate Totals ---
+        with tracer.start_as_current_span("create_bill.price"):
+            bill_items = self._new_items(bill_data)
+            total_amount = self._price_items(bill_items, products)
 
-        # --- Step 3: Save to Database ---
+        # --- Step 4: Save to Database ---
         # Create the Bill object
         bill = Bill(
             customer_id=bill_data.customer_id,
@@ -87,17 +108,317 @@ class BillingService:
             items=bill_items,  # SQLModel will handle the relationship automatically
         )
 
-        self.session.add(bill)
-        self.session.commit()
-        self.session.refresh(bill)
+        # The session does not expire on commit, so the bill and its items
+        # stay loaded without a refresh round trip
+        with tracer.start_as_current_span("create_bill.commit"):
+            self.session.add(bill)
+            try:
+                if before_commit:
+                    await self.session.flush()  # Assigns the ids
+                    await before_commit(bill)
+                await self.session.commit()
+            except Exception:
+                await self.session.rollback()
+                await self.release_stock(lines)
+                raise
 
         return bill
 
-    def get_bill(self, bill_id: int) -> Optional[Bill]:
-        """Get a bill by ID"""
-        return self.session.get(Bill, bill_id)
+    async def submit_bill(
+        self,
+        bill_data: BillCreate,
+        before_commit: Optional[Callable[[Bill], Awaitable[None]]] = None,
+    ) -> Bill:
+        """
+        Record a bill for asynchronous processing (POST /bills?mode=async).
+        The pending bill, its items and an outbox event are written in one
+        transaction (with whatever `before_commit` adds) and no downstream
+        service is called; the outbox worker later validates, prices and
+        reserves stock for it.
+        """
+        bill = Bill(
+            customer_id=bill_data.customer_id,
+            status="pending",
+            items=self._new_items(bill_data),
+        )
+        self.session.add(bill)
+        await self.session.flush()  # Assigns bill.id for the outbox row
+        self.session.add(OutboxEvent(bill_id=bill.id))
+        if before_commit:
+            await before_commit(bill)
+        await self.session.commit()
+        return bill
+
+    @tracer.start_as_current_span("fulfil_bills")
+    async def fulfil_bills(self, bills: List[Bill]) -> List[Tuple[int, int]]:
+        """
+        Settle a batch of pending bills (used by the outbox worker).
+        Customers and products are looked up for the whole batch at once and
+        stock is reserved with a single request, falling back to one request
+        per bill when the batch is refused. Each bill ends up "completed" or
+        "failed"; nothing is committed here.
+
+        Returns the (product_id, quantity) lines that were reserved, so the
+        caller can give them back if saving the outcome fails.
+        Errors other than a refused reservation (e.g. a service being down)
+        propagate, with any stock reserved so far already released.
+        """
+        known_customers, products = await gather_bounded(
+            [
+                customer_client.get_customers(
+                    sorted({bill.customer_id for bill in bills})
+                ),
+                products_client.get_products(
+                    [item.product_id for bill in bills for item in bill.items]
+                ),
+            ],
+            limit=settings.fanout_concurrency,
+        )
+
+        valid_bills: List[Bill] = []
+        for bill in bills:
+            missing = [i.product_id for i in bill.items if i.product_id not in products]
+            if bill.customer_id not in known_customers:
+                self._fail(bill, f"Customer with ID {bill.customer_id} not found")
+            elif missing:
+                self._fail(bill, f"Product with ID {missing[0]} not found")
+            else:
+                valid_bills.append(bill)
+
+        reserved = await self._reserve_for(valid_bills)
+
+        for bill in valid_bills:
+            if bill.status == "pending":
+                bill.total_amount = self._price_items(bill.items, products)
+                bill.status = "completed"
+        return reserved
+
+    @tracer.start_as_current_span("create_bills")
+    async def create_bills(self, bills_data: List[BillCreate]) -> List[Bill]:
+        """
+        Create many bills at once (POST /bills/batch).
+        Distinct customers and products are resolved once for the whole batch,
+        stock is reserved with one request of per-product totals, and every
+        bill that succeeds is inserted in a single transaction.
+
+        Returns one Bill per payload, in order; the ones that could not be
+        created are unsaved and carry status "failed" with the reason.
+        """
+        bills = [
+            Bill(
+                customer_id=bill_data.customer_id,
+                status="pending",
+                items=self._new_items(bill_data),
+            )
+            for bill_data in bills_data
+        ]
+        # Refused bills are failed one by one inside fulfil_bills; what
+        # escapes it is the batch's own fault or a downstream outage
+        try:
+            reserved = await self.fulfil_bills(bills)
+        except StockReservationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to reserve stock: {str(e)}",
+            )
+        except ServiceUnavailableError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+            )
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Downstream request failed: {str(e)}",
+            )
+
+        self.session.add_all([bill for bill in bills if bill.status == "completed"])
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            await self.release_stock(reserved)
+            raise
+        return bills
+
+    async def release_stock(self, lines: List[Tuple[int, int]]):
+        """Give back reserved stock (compensation for a bill that was not saved)"""
+        await products_client.release_stock(lines)
+
+    async def _reserve_for(self, bills: List[Bill]) -> List[Tuple[int, int]]:
+        lines = self._stock_lines(bills)
+        if not lines:
+            return []
+        try:
+            await products_client.reserve_stock(lines)
+            return lines
+        except StockReservationError:
+            pass
+
+        # A single bill can sink the whole batch: retry bill by bill and
+        # fail only the ones inventory refuses
+        reserved: List[Tuple[int, int]] = []
+        for bill in bills:
+            bill_lines = self._stock_lines([bill])
+            try:
+                await products_client.reserve_stock(bill_lines)
+            except StockReservationError as e:
+                self._fail(bill, str(e))
+                continue
+            except Exception:
+                # Not a refusal: undo this batch so it can be retried whole
+                await self.release_stock(reserved)
+                raise
+            reserved.extend(bill_lines)
+        return reserved
+
+    @staticmethod
+    def _stock_lines(bills: List[Bill]) -> List[Tuple[int, int]]:
+        """One (product_id, total quantity) line per distinct product"""
+        quantities: Dict[int, int] = {}
+        for bill in bills:
+            for item in bill.items:
+                quantities[item.product_id] = (
+                    quantities.get(item.product_id, 0) + item.quantity
+                )
+        return sorted(quantities.items())
+
+    @staticmethod
+    def _fail(bill: Bill, reason: str):
+        bill.status = "failed"
+        bill.failure_reason = reason
+
+    @staticmethod
+    def _new_items(bill_data: BillCreate) -> List[BillItem]:
+        """Unpriced bill items; prices are filled in by `_price_items`"""
+        return [
+            BillItem(
+                product_id=item_data.product_id,
+                quantity=item_data.quantity,
+                sub_total=Decimal("0.00"),
+            )
+            for item_data in bill_data.items
+        ]
+
+    @staticmethod
+    def _price_items(items: List[BillItem], products: dict) -> Decimal:
+        """Set each item's price and sub-total; returns the bill total"""
+        total_amount = Decimal("0.00")
+        for item in items:
+            # We trust the price from the Inventory Service, not the user input
+            item.price = Decimal(str(products[item.product_id]["price"]))
+            item.sub_total = item.price * item.quantity
+            total_amount += item.sub_total
+        return total_amount
+
+    async def get_bill(self, bill_id: int) -> Optional[Bill]:
+        """Get a bill by ID (items are loaded with one extra query)"""
+        return await self.session.get(
+            Bill, bill_id, options=[selectinload(Bill.items)]
+        )
+
+    async def list_bills(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Bill]:
+        """
+        List all bills ordered by (bill_date, id) with pagination.
+        With `after` (keyset pagination) the page starts right after that
+        (bill_date, id) pair, which stays cheap however deep the page is;
+        otherwise `skip` is used.
+        Items for the whole page are loaded with a single SELECT ... IN query
+        instead of one lazy load per bill.
+        """
+        statement = (
+            select(Bill)
+            .options(selectinload(Bill.items))
+            .order_by(Bill.bill_date, Bill.id)
+        )
+        if after is not None:
+            statement = statement.where(tuple_(Bill.bill_date, Bill.id) > after)
+        else:
+            statement = statement.offset(skip)
+        results = await self.session.exec(statement.limit(limit))
+        return results.all()
+
+    async def export_bills(
+        self,
+        export_format: str = "ndjson",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        customer_id: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream bills (with their items) as NDJSON or CSV text chunks.
+        Rows are read through a server-side cursor `settings.export_chunk_size`
+        bills at a time. Nothing keeps a chunk referenced once it is written
+        (the session's identity map is weak), so memory stays flat however
+        many bills are exported.
+        """
+        statement = (
+            select(Bill)
+            .options(selectinload(Bill.items))
+            .order_by(Bill.bill_date, Bill.id)
+            .execution_options(yield_per=settings.export_chunk_size)
+        )
+        if start is not None:
+            statement = statement.where(Bill.bill_date >= start)
+        if end is not None:
+            statement = statement.where(Bill.bill_date < end)
+        if customer_id is not None:
+            statement = statement.where(Bill.customer_id == customer_id)
+
+        if export_format == "csv":
+            yield self._csv_rows([EXPORT_CSV_HEADER])
+
+        result = await self.session.stream_scalars(statement)
+        async for bills in result.partitions():
+            if export_format == "csv":
+                yield self._csv_rows(
+                    row for bill in bills for row in self._csv_bill_rows(bill)
+                )
+            else:
+                yield "".join(
+                    BillRead.model_validate(bill).model_dump_json() + "\n"
+                    for bill in bills
+                )
+
+    @staticmethod
+    def _csv_bill_rows(bill: Bill):
+        """One CSV row per bill item (bills without items get a single row)"""
+        bill_columns = [
+            bill.id,
+            bill.customer_id,
+            bill.bill_date.isoformat(),
+            bill.total_amount,
+        ]
+        if not bill.items:
+            yield bill_columns + [""] * 5
+        for item in bill.items:
+            yield bill_columns + [
+                item.id,
+                item.product_id,
+                item.quantity,
+                item.price,
+                item.sub_total,
+            ]
+
+    @staticmethod
+    def _csv_rows(rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
 
-    def list_bills(self, skip: int = 0, limit: int = 100) -> List[Bill]:
-        """List all bills with pagination"""
-        statement = select(Bill).offset(skip).limit(limit)
-        return self.session.exec(statement).all()
+EXPORT_CSV_HEADER = [
+    "bill_id",
+    "customer_id",
+    "bill_date",
+    "total_amount",
+    "item_id",
+    "product_id",
+    "quantity",
+    "price",
+    "sub_total",
+]
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.models import IdempotencyKey
+
+
+class IdempotencyService:
+    """
+    Makes a request safe to retry by storing its outcome under the client's
+    Idempotency-Key. The first request claims the key by inserting a row
+    (the primary key makes that atomic); duplicates either replay the stored
+    response or wait for the in-flight request to finish.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # created_at of the claim this request owns (it identifies the claim
+        # if an abandoned one was taken over by another request meanwhile)
+        self.claimed_at: Optional[datetime] = None
+
+    @staticmethod
+    def fingerprint(payload: SQLModel, mode: str) -> str:
+        """
+        Hash of the request body and mode, to reject a key reused for another
+        request (the same bill submitted sync then async gets another response)
+        """
+        content = f"{mode}\n{payload.model_dump_json()}"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    async def claim(self, key: str, request_hash: str) -> Optional[IdempotencyKey]:
+        """
+        Claim `key` for the current request.
+        Returns None when the caller now owns the key and must run the request
+        (then `complete` it in the request's transaction, or `release` it),
+        or the stored record of an earlier identical request to replay.
+        """
+        deadline = time.monotonic() + settings.idempotency_wait_timeout
+        while True:
+            if await self._insert(key, request_hash):
+                return None
+
+            record = await self.session.get(
+                IdempotencyKey, key, populate_existing=True
+            )
+            # End the read transaction so the next poll sees fresh commits
+            await self.session.commit()
+            if record is None:
+                continue  # Released in the meantime, try to claim it again
+
+            now = datetime.now()
+            lock_expiry = record.created_at + timedelta(
+                seconds=settings.idempotency_lock_timeout
+            )
+            abandoned = record.status_code is None and lock_expiry <= now
+            if record.expires_at <= now or abandoned:
+                await self._delete(key, created_at=record.created_at)
+                continue
+
+            if record.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            if record.status_code is not None:
+                return record
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            await asyncio.sleep(settings.idempotency_poll_interval)
+
+    async def complete(
+        self, key: str, bill_id: Optional[int], status_code: int, response_body: str
+    ):
+        """
+        Store the response of the request that owns `key`. Nothing is
+        committed: the caller commits it in the same transaction as the bill,
+        so a stored bill can never be left behind by an unfinished claim.
+        Raises a 409 when the claim is no longer ours (taken over after
+        `idempotency_lock_timeout`, or removed), so the caller rolls back.
+        """
+        statement = (
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.created_at == self.claimed_at,
+                IdempotencyKey.status_code.is_(None),
+            )
+            .values(
+                bill_id=bill_id, status_code=status_code, response_body=response_body
+            )
+        )
+        result = await self.session.exec(statement)
+        if result.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The Idempotency-Key claim expired before the request finished",
+            )
+
+    async def release(self, key: str):
+        """Drop our unfinished claim (the request failed) so the client can retry"""
+        # The failed request may have left the session mid-transaction
+        await self.session.rollback()
+        await self._delete(key, created_at=self.claimed_at, unfinished=True)
+
+    async def _insert(self, key: str, request_hash: str) -> bool:
+        # A Core INSERT, so an earlier polled copy of the row in the identity
+        # map does not clash with a new instance
+        now = datetime.now()
+        statement = insert(IdempotencyKey).values(
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency_key_ttl),
+        )
+        try:
+            await self.session.exec(statement)
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            return False
+        self.claimed_at = now
+        return True
+
+    async def _delete(self, key: str, created_at: datetime, unfinished: bool = False):
+        # Only that exact claim is removed (another request may hold a newer
+        # one); with `unfinished`, only while no response is stored in it
+        statement = delete(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.created_at == created_at
+        )
+        if unfinished:
+            statement = statement.where(IdempotencyKey.status_code.is_(None))
+        await self.session.exec(statement)
+        await self.session.commit()
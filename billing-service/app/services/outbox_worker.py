@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models import Bill, OutboxEvent
+from app.services.billing_service import BillingService
+
+
+class OutboxWorker:
+    """
+    Background task that drains the outbox written by async bill submissions.
+    Each pass claims up to `settings.outbox_batch_size` pending events and
+    settles their bills together (one inventory reservation per batch).
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wake the worker right away instead of waiting for the next poll"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                print(f"❌ Outbox worker pass failed: {e}")
+                processed = 0
+            if processed < settings.outbox_batch_size:
+                # Outbox drained (or failing): sleep until notified or polled
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=settings.outbox_poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def run_once(self) -> int:
+        """
+        Process one batch of due events; returns how many were settled
+        (0 when the pass failed, so the loop backs off instead of retrying)
+        """
+        async with AsyncSession(database.engine, expire_on_commit=False) as session:
+            # SKIP LOCKED lets several replicas drain the outbox side by side
+            statement = (
+                select(OutboxEvent)
+                .where(
+                    OutboxEvent.status == "pending",
+                    OutboxEvent.next_attempt_at <= datetime.now(),
+                )
+                .order_by(OutboxEvent.id)
+                .limit(settings.outbox_batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = (await session.exec(statement)).all()
+            if not events:
+                return 0
+
+            statement = (
+                select(Bill)
+                .where(Bill.id.in_([event.bill_id for event in events]))
+                .options(selectinload(Bill.items))
+            )
+            bills = (await session.exec(statement)).all()
+            pending = [bill for bill in bills if bill.status == "pending"]
+
+            service = BillingService(session)
+            try:
+                reserved = await service.fulfil_bills(pending) if pending else []
+            except Exception as e:
+                # Nothing is reserved at this point: retry the batch later
+                print(f"⚠️ Outbox batch failed, retrying with backoff: {e}")
+                self._record_failure(events, pending, str(e))
+                await session.commit()
+                return 0
+
+            now = datetime.now()
+            for event in events:
+                event.status = "done"
+                event.processed_at = now
+            session.add_all(events)
+            try:
+                await session.commit()
+            except Exception:
+                # The outcome was not saved: compensate the reservation so a
+                # later pass can reserve it again from scratch
+                await session.rollback()
+                await service.release_stock(reserved)
+                raise
+            return len(events)
+
+    @staticmethod
+    def _record_failure(events, bills, error: str):
+        bills_by_id = {bill.id: bill for bill in bills}
+        now = datetime.now()
+        for event in events:
+            event.attempts += 1
+            event.last_error = error
+            delay = min(
+                settings.outbox_retry_backoff * 2 ** (event.attempts - 1),
+                settings.outbox_retry_backoff_max,
+            )
+            event.next_attempt_at = now + timedelta(seconds=delay)
+            if event.attempts >= settings.outbox_max_attempts:
+                event.status = "failed"
+                bill = bills_by_id.get(event.bill_id)
+                if bill is not None:
+                    bill.status = "failed"
+                    bill.failure_reason = error
+
+
+# Global instance
+outbox_worker = OutboxWorker()
@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import database
 from app import main as app_main
@@ -11,25 +13,27 @@ from app.services import billing_service as service_module
 
 
 @pytest.fixture
-def engine():
-    """Create a pure in-memory SQLite engine for tests."""
+async def engine():
+    """Create a pure in-memory async SQLite engine for tests."""
     from sqlalchemy.pool import StaticPool
 
-    url = "sqlite:///:memory:"
-    engine = create_engine(
+    url = "sqlite+aiosqlite:///:memory:"
+    engine = create_async_engine(
         url,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
         pool_pre_ping=True,
     )
-    SQLModel.metadata.create_all(engine)
-    return engine
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
 
 
 @pytest.fixture
-def session(engine):
+async def session(engine):
     """Create a fresh session for a test."""
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -48,6 +52,14 @@ def mock_external_clients(monkeypatch):
         "name": "Test Customer",
         "email": "test@test.com",
     }
+    mock_cust_client.get_customers.side_effect = lambda customer_ids: {
+        customer_id: {
+            "id": customer_id,
+            "name": "Test Customer",
+            "email": "test@test.com",
+        }
+        for customer_id in customer_ids
+    }
     monkeypatch.setattr(service_module, "customer_client", mock_cust_client)
 
     # 2. Mock ProductsClient
@@ -59,7 +71,16 @@ def mock_external_clients(monkeypatch):
         "price": 10.0,
         "quantity": 100,
     }
-    mock_prod_client.decrease_stock.return_value = True
+    mock_prod_client.get_products.side_effect = lambda product_ids: {
+        product_id: {
+            "id": product_id,
+            "name": "Test Product",
+            "price": 10.0,
+            "quantity": 100,
+        }
+        for product_id in product_ids
+    }
+    mock_prod_client.reserve_stock.return_value = []
     monkeypatch.setattr(service_module, "products_client", mock_prod_client)
 
     return mock_cust_client, mock_prod_client
@@ -70,8 +91,8 @@ def client(monkeypatch, engine, mock_external_clients):
     """TestClient that overrides DB and Mocks External Services."""
 
     # Override get_session dependency
-    def get_session_override():
-        with Session(engine) as s:
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as s:
             yield s
 
     monkeypatch.setattr(database, "engine", engine)
@@ -91,10 +112,19 @@ def client(monkeypatch, engine, mock_external_clients):
         pass
 
     # Disable Consul Registration during tests
-    monkeypatch.setattr(app_main, "create_db_and_tables", lambda: None)
+    async def create_db_and_tables_noop():
+        pass
+
+    monkeypatch.setattr(app_main, "create_db_and_tables", create_db_and_tables_noop)
     try:
         monkeypatch.setattr(app_main.consul_client, "register_service", lambda: None)
         monkeypatch.setattr(app_main.consul_client, "deregister_service", lambda: None)
+        monkeypatch.setattr(
+            app_main.consul_client, "watch_services", lambda *args, **kwargs: None
+        )
+        monkeypatch.setattr(app_main.consul_client, "stop_watching", lambda: None)
+        # Outbox passes are driven explicitly by the tests that need them
+        monkeypatch.setattr(app_main.outbox_worker, "start", lambda: None)
     except Exception:
         pass
 
@@ -28,8 +28,8 @@ async def test_create_bill_success(session, mock_external_clients):
 
     # Verify external calls
     mock_cust.get_customer.assert_called_with(1)
-    mock_prod.get_product.assert_called_with(100)
-    mock_prod.decrease_stock.assert_called_with(100, 2)
+    mock_prod.get_products.assert_called_with([100])
+    mock_prod.reserve_stock.assert_called_with([(100, 2)])
 
 
 @pytest.mark.asyncio
@@ -51,8 +51,8 @@ async def test_create_bill_customer_not_found(session, mock_external_clients):
 @pytest.mark.asyncio
 async def test_create_bill_product_not_found(session, mock_external_clients):
     _, mock_prod = mock_external_clients
-    # Simulate Product 404
-    mock_prod.get_product.return_value = None
+    # Simulate Product 404 (unknown ids are absent from the batch result)
+    mock_prod.get_products.side_effect = lambda product_ids: {}
 
     service = BillingService(session)
     bill_data = BillCreate(
@@ -69,8 +69,8 @@ async def test_create_bill_product_not_found(session, mock_external_clients):
 @pytest.mark.asyncio
 async def test_create_bill_stock_error(session, mock_external_clients):
     _, mock_prod = mock_external_clients
-    # Simulate Stock Update Failure (e.g. insufficient stock)
-    mock_prod.decrease_stock.side_effect = Exception("Insufficient stock")
+    # Simulate Stock Reservation Failure (e.g. insufficient stock)
+    mock_prod.reserve_stock.side_effect = Exception("Insufficient stock")
 
     service = BillingService(session)
     bill_data = BillCreate(
@@ -82,3 +82,66 @@ async def test_create_bill_stock_error(session, mock_external_clients):
 
     assert exc.value.status_code == 400
     assert "Insufficient stock" in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_create_bill_multiple_items_fanout(session, mock_external_clients):
+    mock_cust, mock_prod = mock_external_clients
+
+    bill_data = BillCreate(
+        customer_id=1,
+        items=[BillItemCreate(product_id=pid, quantity=pid) for pid in (1, 2, 3)],
+    )
+
+    bill = await BillingService(session).create_bill(bill_data)
+
+    # Items keep the order of the request; price was mocked as 10.0
+    assert [item.product_id for item in bill.items] == [1, 2, 3]
+    assert bill.total_amount == 60.0
+    # All products are priced with a single batch lookup
+    mock_prod.get_products.assert_awaited_once_with([1, 2, 3])
+    # ...and all stock is reserved with a single atomic request
+    mock_prod.reserve_stock.assert_awaited_once_with([(1, 1), (2, 2), (3, 3)])
+
+
+@pytest.mark.asyncio
+async def test_create_bill_missing_product_skips_stock_update(
+    session, mock_external_clients
+):
+    _, mock_prod = mock_external_clients
+    mock_prod.get_products.side_effect = lambda product_ids: {
+        product_id: {"id": product_id, "price": 10.0}
+        for product_id in product_ids
+        if product_id != 2
+    }
+
+    bill_data = BillCreate(
+        customer_id=1,
+        items=[BillItemCreate(product_id=pid, quantity=1) for pid in (1, 2, 3)],
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await BillingService(session).create_bill(bill_data)
+
+    assert exc.value.status_code == 404
+    assert "Product with ID 2" in exc.value.detail
+    mock_prod.reserve_stock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_bill_duplicate_products(session, mock_external_clients):
+    _, mock_prod = mock_external_clients
+
+    bill_data = BillCreate(
+        customer_id=1,
+        items=[
+            BillItemCreate(product_id=7, quantity=1),
+            BillItemCreate(product_id=7, quantity=2),
+        ],
+    )
+
+    bill = await BillingService(session).create_bill(bill_data)
+
+    assert len(bill.items) == 2
+    assert bill.total_amount == 30.0
+    mock_prod.get_products.assert_awaited_once()
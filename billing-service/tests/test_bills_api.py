@@ -46,4 +46,187 @@ def test_list_bills_pagination(client, mock_external_clients):
 
     # 3. Test pagination (limit 2)
     resp_limit = client.get("/api/bills?limit=2")
-    assert len(resp_limit.json()) == 2
\ No newline at end of file
+    assert len(resp_limit.json()) == 2
+
+def _count_queries(engine):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # Core events are only available on the sync engine behind the async one
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(
+        sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+def test_list_bills_query_count_is_constant(client, engine, mock_external_clients):
+    payload = {
+        "customer_id": 1,
+        "items": [{"product_id": 10, "quantity": 1}, {"product_id": 11, "quantity": 2}],
+    }
+    for _ in range(12):
+        client.post("/api/bills", json=payload)
+
+    counts = {}
+    for page_size in (1, 4, 12):
+        statements, stop = _count_queries(engine)
+        resp = client.get(f"/api/bills?limit={page_size}")
+        stop()
+
+        assert resp.status_code == 200
+        assert len(resp.json()) == page_size
+        assert all(len(bill["items"]) == 2 for bill in resp.json())
+        counts[page_size] = len(statements)
+
+    # One query for the bills and one for all of their items, whatever the page size
+    assert counts == {1: 2, 4: 2, 12: 2}
+
+
+def test_get_bill_loads_items_eagerly(client, engine, mock_external_clients):
+    payload = {"customer_id": 1, "items": [{"product_id": 10, "quantity": 1}]}
+    bill_id = client.post("/api/bills", json=payload).json()["id"]
+
+    statements, stop = _count_queries(engine)
+    resp = client.get(f"/api/bills/{bill_id}")
+    stop()
+
+    assert len(resp.json()["items"]) == 1
+    assert len(statements) == 2
+
+
+def test_list_bills_cursor_pagination(client, mock_external_clients):
+    payload = {"customer_id": 1, "items": [{"product_id": 10, "quantity": 1}]}
+    created = [client.post("/api/bills", json=payload).json()["id"] for _ in range(5)]
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/bills?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        resp = client.get(url)
+        assert resp.status_code == 200
+        seen.extend(bill["id"] for bill in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == created
+
+    # The legacy skip parameter keeps working
+    resp = client.get("/api/bills?skip=4&limit=2")
+    assert [bill["id"] for bill in resp.json()] == created[4:]
+
+
+def test_list_bills_invalid_cursor(client):
+    resp = client.get("/api/bills?cursor=not-a-cursor")
+    assert resp.status_code == 400
+
+
+def test_export_bills_ndjson(client, mock_external_clients, monkeypatch):
+    import json
+    from app.config import settings
+
+    # Force several server-side cursor chunks
+    monkeypatch.setattr(settings, "export_chunk_size", 2)
+    for customer_id in (1, 2, 1, 1, 2):
+        client.post(
+            "/api/bills",
+            json={"customer_id": customer_id, "items": [{"product_id": 10, "quantity": 1}]},
+        )
+
+    resp = client.get("/api/bills/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    bills = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(bills) == 5
+    assert all(len(bill["items"]) == 1 for bill in bills)
+
+    resp = client.get("/api/bills/export?customer_id=2")
+    assert len(resp.text.splitlines()) == 2
+
+
+def test_export_bills_csv_and_date_filter(client, mock_external_clients):
+    import csv
+    import io
+
+    payload = {
+        "customer_id": 1,
+        "items": [{"product_id": 10, "quantity": 1}, {"product_id": 11, "quantity": 3}],
+    }
+    bill = client.post("/api/bills", json=payload).json()
+
+    resp = client.get("/api/bills/export?format=csv")
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    # One row per line item
+    assert [row["product_id"] for row in rows] == ["10", "11"]
+    assert rows[1]["bill_id"] == str(bill["id"])
+    assert float(rows[1]["sub_total"]) == 30.0
+
+    resp = client.get(
+        "/api/bills/export", params={"format": "csv", "start": "2999-01-01T00:00:00"}
+    )
+    assert resp.text.splitlines() == [
+        "bill_id,customer_id,bill_date,total_amount,item_id,product_id,quantity,price,sub_total"
+    ]
+
+    assert client.get("/api/bills/export?format=xml").status_code == 422
+
+
+def test_create_bills_batch(client, mock_external_clients):
+    mock_cust, mock_prod = mock_external_clients
+    mock_cust.get_customers.side_effect = lambda ids: {
+        i: {"id": i} for i in ids if i != 99
+    }
+    payload = {
+        "bills": [
+            {"customer_id": 1, "items": [{"product_id": 10, "quantity": 1}]},
+            {"customer_id": 99, "items": [{"product_id": 10, "quantity": 1}]},
+            {"customer_id": 2, "items": [{"product_id": 10, "quantity": 2}]},
+            {"customer_id": 1, "items": [{"product_id": 11, "quantity": 1}]},
+        ]
+    }
+
+    resp = client.post("/api/bills/batch", json=payload)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["created"], data["failed"]) == (3, 1)
+    assert [r["status"] for r in data["results"]] == [
+        "created",
+        "failed",
+        "created",
+        "created",
+    ]
+    assert "Customer with ID 99" in data["results"][1]["error"]
+    assert float(data["results"][2]["bill"]["total_amount"]) == 20.0
+    # Customers and products are resolved once, stock in one aggregated request
+    mock_cust.get_customers.assert_awaited_once_with([1, 2, 99])
+    mock_prod.get_products.assert_awaited_once()
+    mock_prod.reserve_stock.assert_awaited_once_with([(10, 3), (11, 1)])
+    assert len(client.get("/api/bills").json()) == 3
+
+
+def test_create_bills_batch_reports_downstream_outages(client, mock_external_clients):
+    import httpx
+    from app.clients.http_client import ServiceUnavailableError
+
+    mock_cust, mock_prod = mock_external_clients
+    payload = {
+        "bills": [{"customer_id": 1, "items": [{"product_id": 10, "quantity": 1}]}]
+    }
+
+    mock_prod.reserve_stock.side_effect = httpx.ConnectError("refused")
+    assert client.post("/api/bills/batch", json=payload).status_code == 502
+
+    mock_cust.get_customers.side_effect = ServiceUnavailableError("Customer down")
+    assert client.post("/api/bills/batch", json=payload).status_code == 503
+    assert client.get("/api/bills").json() == []
+
+
+def test_create_bills_batch_requires_bills(client):
+    assert client.post("/api/bills/batch", json={"bills": []}).status_code == 422
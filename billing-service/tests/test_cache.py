@@ -0,0 +1,55 @@
+import time
+
+from app.cache import MISSING, TTLCache
+
+
+def test_get_set_and_counters():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    cache.set("none", None)
+
+    assert cache.get("a") == 1
+    assert cache.get("none") is None
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 0}
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes the least recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("a", 1)
+    cache.set("short", 2, ttl=1)
+
+    now[0] += 5
+    assert cache.get("a") == 1
+    assert cache.get("short") is MISSING
+
+    now[0] += 10
+    assert cache.get("a") is MISSING
+    assert cache.stats()["size"] == 0
+
+
+def test_delete_and_zero_size():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.delete("a")
+    assert cache.get("a") is MISSING
+
+    disabled = TTLCache(maxsize=0, ttl=60)
+    disabled.set("a", 1)
+    assert disabled.get("a") is MISSING
@@ -0,0 +1,277 @@
+import json
+
+import httpx
+import pytest
+
+from app.clients import customer_client as customer_module
+from app.clients import http_client as http_module
+from app.clients import products_client as products_module
+from app.clients.customer_client import CustomerClient
+from app.clients.http_client import HTTPClient
+from app.clients.products_client import ProductsClient
+
+
+@pytest.fixture
+def fake_downstream(monkeypatch):
+    """
+    Route the shared HTTP client to in-process fake downstream services.
+    Tests set `fake_downstream.handler` to shape the responses.
+    """
+
+    class FakeDownstream:
+        def __init__(self):
+            self.requests = []
+            self.handler = lambda request: httpx.Response(200, json=[])
+
+    fake = FakeDownstream()
+
+    def dispatch(request: httpx.Request) -> httpx.Response:
+        fake.requests.append(request)
+        return fake.handler(request)
+
+    shared = HTTPClient()
+    shared._client = httpx.AsyncClient(transport=httpx.MockTransport(dispatch))
+    monkeypatch.setattr(products_module, "http_client", shared)
+    monkeypatch.setattr(customer_module, "http_client", shared)
+    monkeypatch.setattr(
+        products_module.consul_client,
+        "get_service_url",
+        lambda name: {
+            "inventory-service": "http://inventory",
+            "customer-service": "http://customers",
+        }[name],
+    )
+    return fake
+
+
+def fake_inventory(catalog):
+    """Handler answering POST /products/batch/revalidate from {id: product}"""
+
+    def handler(request):
+        assert request.url.path == "/products/batch/revalidate"
+        body = {"changed": [], "unchanged": [], "missing": []}
+        for product_id, tag in json.loads(request.content)["known"].items():
+            product = catalog.get(int(product_id))
+            if product is None:
+                body["missing"].append(int(product_id))
+            elif tag == product["price_tag"]:
+                body["unchanged"].append(int(product_id))
+            else:
+                body["changed"].append(product)
+        return httpx.Response(200, json=body)
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_get_products_collapses_duplicates(fake_downstream):
+    fake_downstream.handler = fake_inventory(
+        {i: {"id": i, "price": 1.5, "price_tag": "t"} for i in (1, 3)}
+    )
+
+    products = await ProductsClient().get_products([3, 1, 3, 404, 1])
+
+    assert len(fake_downstream.requests) == 1
+    assert json.loads(fake_downstream.requests[0].content) == {
+        "known": {"3": None, "1": None, "404": None}
+    }
+    assert set(products) == {1, 3}
+
+
+@pytest.mark.asyncio
+async def test_get_products_empty_skips_request(fake_downstream):
+    assert await ProductsClient().get_products([]) == {}
+    assert fake_downstream.requests == []
+
+
+@pytest.mark.asyncio
+async def test_reserve_stock_sends_all_lines_in_one_request(fake_downstream):
+    fake_downstream.handler = lambda request: httpx.Response(
+        400, json={"detail": "Insufficient stock for product 2"}
+    )
+
+    with pytest.raises(products_module.StockReservationError) as exc:
+        await ProductsClient().reserve_stock([(1, 2), (2, 5)])
+
+    assert "Insufficient stock" in str(exc.value)
+    assert len(fake_downstream.requests) == 1
+    assert fake_downstream.requests[0].url.path == "/products/stock/reserve"
+    assert json.loads(fake_downstream.requests[0].content) == {
+        "items": [
+            {"product_id": 1, "quantity": 2},
+            {"product_id": 2, "quantity": 5},
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_release_stock_posts_compensation(fake_downstream):
+    await ProductsClient().release_stock([(4, 1)])
+
+    assert fake_downstream.requests[0].url.path == "/products/stock/release"
+    assert json.loads(fake_downstream.requests[0].content) == {
+        "items": [{"product_id": 4, "quantity": 1}]
+    }
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_reused_and_configured(monkeypatch):
+    monkeypatch.setattr(http_module.settings, "http_read_timeout", 1.5)
+    shared = HTTPClient()
+
+    first = shared.client
+    assert shared.client is first
+    assert first.timeout.read == 1.5
+
+    await shared.close()
+    assert first.is_closed
+    assert shared.client is not first
+    await shared.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_are_recorded_for_load_balancing(fake_downstream, monkeypatch):
+    from app.load_balancer import LoadBalancer
+
+    balancer = LoadBalancer()
+    monkeypatch.setattr(http_module, "load_balancer", balancer)
+    fake_downstream.handler = lambda request: httpx.Response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await ProductsClient().get_products([1])
+
+    stats = balancer.stats("http://inventory")
+    assert stats.samples == 1
+    assert stats.in_flight == 0
+    assert stats.ewma >= http_module.settings.lb_error_penalty
+
+
+@pytest.mark.asyncio
+async def test_customer_lookups_are_cached(fake_downstream):
+    fake_downstream.handler = lambda request: (
+        httpx.Response(404)
+        if request.url.path == "/customers/2"
+        else httpx.Response(200, json={"id": 1, "name": "Ann"})
+    )
+    client = CustomerClient()
+
+    assert (await client.get_customer(1))["name"] == "Ann"
+    assert (await client.get_customer(1))["name"] == "Ann"
+    # Unknown customers are cached too (negative entry)
+    assert await client.get_customer(2) is None
+    assert await client.get_customer(2) is None
+
+    assert len(fake_downstream.requests) == 2
+    assert client.cache.stats()["hits"] == 2
+    assert client.cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_customer_negative_entries_expire_quickly(fake_downstream, monkeypatch):
+    monkeypatch.setattr(customer_module.settings, "customer_cache_negative_ttl", 0)
+    fake_downstream.handler = lambda request: httpx.Response(404)
+    client = CustomerClient()
+
+    assert await client.get_customer(5) is None
+    assert await client.get_customer(5) is None
+
+    assert len(fake_downstream.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_customers_fetches_uncached_ids_in_one_request(fake_downstream):
+    fake_downstream.handler = lambda request: httpx.Response(
+        200,
+        json={
+            "customers": [{"id": 3, "name": "Cy"}],
+            "missing": [4],
+        },
+    )
+    client = CustomerClient()
+    client.cache.set(1, {"id": 1, "name": "Cached"})
+
+    customers = await client.get_customers([1, 3, 4, 3])
+
+    assert customers == {1: {"id": 1, "name": "Cached"}, 3: {"id": 3, "name": "Cy"}}
+    assert len(fake_downstream.requests) == 1
+    assert fake_downstream.requests[0].url.path == "/customers/batch"
+    assert json.loads(fake_downstream.requests[0].content) == {"ids": [3, 4]}
+
+    # Both the hit and the miss are now cached
+    assert await client.get_customers([3, 4]) == {3: {"id": 3, "name": "Cy"}}
+    assert len(fake_downstream.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_customer_errors_are_not_cached(fake_downstream):
+    fake_downstream.handler = lambda request: httpx.Response(500)
+    client = CustomerClient()
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_customer(1)
+
+    assert len(fake_downstream.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_prices_are_revalidated_in_one_request(
+    fake_downstream, monkeypatch
+):
+    catalog = {
+        i: {"id": i, "price": 2.0, "quantity": 5, "price_tag": "p2"} for i in range(20)
+    }
+    fake_downstream.handler = fake_inventory(catalog)
+    client = ProductsClient()
+
+    # Unknown -> one batch request; fresh -> memory
+    assert len(await client.get_products(list(catalog))) == 20
+    assert len(await client.get_products(list(catalog))) == 20
+    assert len(fake_downstream.requests) == 1
+
+    # Once stale, the whole cart is revalidated with one request that sends
+    # the held price tags; stock moves alone leave the tags unchanged
+    monkeypatch.setattr(products_module.settings, "product_price_max_staleness", 0)
+    catalog[3] = {"id": 3, "price": 2.5, "quantity": 4, "price_tag": "p2.5"}
+
+    products = await client.get_products(list(catalog))
+
+    assert len(fake_downstream.requests) == 2
+    sent = json.loads(fake_downstream.requests[1].content)["known"]
+    assert set(sent.values()) == {"p2"}
+    assert products[3]["price"] == 2.5
+    assert products[4]["price"] == 2.0
+    assert client.price_cache.get(3).product["price_tag"] == "p2.5"
+
+
+@pytest.mark.asyncio
+async def test_deleted_product_is_dropped_from_price_cache(fake_downstream, monkeypatch):
+    monkeypatch.setattr(products_module.settings, "product_price_max_staleness", 0)
+    client = ProductsClient()
+    client._cache_product({"id": 9, "price": 1.0, "price_tag": "old"})
+    fake_downstream.handler = fake_inventory({})
+
+    assert await client.get_products([9]) == {}
+    assert client.price_cache.get(9) is products_module.MISSING
+
+
+@pytest.mark.asyncio
+async def test_downstream_calls_are_measured(fake_downstream):
+    from prometheus_client import REGISTRY
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    latency = {"service": "inventory-service", "method": "POST"}
+    errors = {"service": "inventory-service", "reason": "http_503"}
+    calls_before = sample("downstream_request_duration_seconds_count", **latency)
+    errors_before = sample("downstream_request_errors_total", **errors)
+    fake_downstream.handler = lambda request: httpx.Response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await ProductsClient().get_products([1])
+
+    assert sample("downstream_request_duration_seconds_count", **latency) == (
+        calls_before + 1
+    )
+    assert sample("downstream_request_errors_total", **errors) == errors_before + 1
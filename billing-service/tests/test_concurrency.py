@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.concurrency import gather_bounded
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_limits_in_flight_and_keeps_order():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def work(value):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01 * (5 - value))
+        in_flight -= 1
+        return value
+
+    results = await gather_bounded([work(i) for i in range(5)], limit=2)
+
+    assert results == [0, 1, 2, 3, 4]
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_propagates_errors():
+    async def boom():
+        raise ValueError("boom")
+
+    async def ok():
+        return 1
+
+    with pytest.raises(ValueError):
+        await gather_bounded([ok(), boom()], limit=1)
@@ -21,3 +21,114 @@ def test_consul_register_calls_agent(monkeypatch):
 
     consul_client.deregister_service()
     fake_consul.agent.service.deregister.assert_called()
+
+
+def _entry(address, port):
+    """Shape of one entry returned by Consul's health.service endpoint"""
+    return {
+        "Node": {"Address": "10.0.0.1"},
+        "Service": {"Address": address, "Port": port},
+        "Checks": [{"Status": "passing"}],
+    }
+
+
+def test_get_service_url_reads_only_from_cache(monkeypatch):
+    from app.consul_client import ConsulClient
+
+    client = ConsulClient()
+    client.consul = MagicMock()
+    monkeypatch.setattr(client, "_ensure_watch", lambda service_name: None)
+
+    assert client.get_service_url("inventory-service") is None
+
+    client._store("inventory-service", [_entry("inv-1", 8082), _entry("", 9000)])
+
+    for _ in range(10):
+        assert client.get_service_url("inventory-service") in {
+            "http://inv-1:8082",
+            "http://10.0.0.1:9000",
+        }
+    client.consul.health.service.assert_not_called()
+
+
+def test_watch_keeps_last_known_instances_when_consul_fails(monkeypatch):
+    import threading
+    from app.consul_client import ConsulClient
+
+    monkeypatch.setattr(settings, "consul_retry_interval", 0.01)
+    failures = threading.Event()
+    calls = []
+
+    def health_service(service_name, index=None, wait=None, passing=None):
+        assert passing is True
+        calls.append(index)
+        if len(calls) == 1:
+            return 7, [_entry("cust-1", 8081)]
+        failures.set()
+        raise ConnectionError("consul down")
+
+    client = ConsulClient()
+    client.consul = MagicMock()
+    client.consul.health.service.side_effect = health_service
+
+    try:
+        client.watch_services(["customer-service"], timeout=2)
+        assert client.get_service_url("customer-service") == "http://cust-1:8081"
+
+        # The follow-up blocking query carries the index; once Consul is
+        # unreachable the cache keeps serving the last known list.
+        assert failures.wait(2)
+        assert calls[1] == 7
+        assert client.get_service_url("customer-service") == "http://cust-1:8081"
+    finally:
+        client.stop_watching()
+
+
+def test_stale_cache_restarts_watch(monkeypatch):
+    from app.consul_client import ConsulClient
+
+    monkeypatch.setattr(settings, "consul_cache_ttl", 0)
+    client = ConsulClient()
+    client.consul = MagicMock()
+    client.consul.health.service.return_value = (1, [_entry("inv-1", 8082)])
+
+    try:
+        client.watch_services(["inventory-service"], timeout=2)
+        first_thread = client._threads["inventory-service"]
+
+        client.get_service_url("inventory-service")
+        assert client._threads["inventory-service"] is not first_thread
+    finally:
+        client.stop_watching()
+
+
+def test_watch_resets_a_backwards_index_without_spinning(monkeypatch):
+    import threading
+    import time
+    from app.consul_client import ConsulClient
+
+    monkeypatch.setattr(settings, "consul_watch_min_interval", 0.05)
+    done = threading.Event()
+    calls = []
+    indexes = iter([5, 3, 4])
+
+    def health_service(service_name, index=None, wait=None, passing=None):
+        # Consul answers at once, and its index goes backwards (e.g. a restore)
+        calls.append((time.monotonic(), index))
+        if len(calls) == 4:
+            done.set()
+        return next(indexes, 4), [_entry("inv-1", 8082)]
+
+    client = ConsulClient()
+    client.consul = MagicMock()
+    client.consul.health.service.side_effect = health_service
+
+    try:
+        client.watch_services(["inventory-service"], timeout=2)
+        assert done.wait(2)
+    finally:
+        client.stop_watching()
+
+    assert [index for _, index in calls[:4]] == [None, 5, None, 4]
+    gaps = [later - earlier for (earlier, _), (later, _) in zip(calls, calls[1:4])]
+    assert min(gaps) >= 0.04
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.services.idempotency_service import IdempotencyService
+
+PAYLOAD = {"customer_id": 1, "items": [{"product_id": 10, "quantity": 2}]}
+
+
+def test_retry_replays_stored_response(client, mock_external_clients):
+    _, mock_prod = mock_external_clients
+    headers = {"Idempotency-Key": "bill-1"}
+
+    first = client.post("/api/bills", json=PAYLOAD, headers=headers)
+    retry = client.post("/api/bills", json=PAYLOAD, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert mock_prod.reserve_stock.await_count == 1
+    assert len(client.get("/api/bills").json()) == 1
+
+
+def test_key_reused_for_another_request(client, mock_external_clients):
+    headers = {"Idempotency-Key": "bill-2"}
+    client.post("/api/bills", json=PAYLOAD, headers=headers)
+
+    other = {"customer_id": 1, "items": [{"product_id": 11, "quantity": 1}]}
+    resp = client.post("/api/bills", json=other, headers=headers)
+
+    assert resp.status_code == 422
+
+
+def test_key_reused_with_another_mode(client, mock_external_clients):
+    headers = {"Idempotency-Key": "bill-5"}
+    assert client.post("/api/bills", json=PAYLOAD, headers=headers).status_code == 201
+
+    resp = client.post("/api/bills?mode=async", json=PAYLOAD, headers=headers)
+
+    assert resp.status_code == 422
+
+
+def test_failed_request_releases_key(client, mock_external_clients):
+    mock_cust, _ = mock_external_clients
+    headers = {"Idempotency-Key": "bill-3"}
+
+    mock_cust.get_customer.return_value = None
+    assert client.post("/api/bills", json=PAYLOAD, headers=headers).status_code == 404
+
+    mock_cust.get_customer.return_value = {"id": 1, "name": "Back", "email": "b@b.com"}
+    resp = client.post("/api/bills", json=PAYLOAD, headers=headers)
+
+    assert resp.status_code == 201
+    assert "Idempotent-Replayed" not in resp.headers
+
+
+def test_lost_claim_rolls_back_the_bill(
+    client, engine, mock_external_clients, monkeypatch
+):
+    _, mock_prod = mock_external_clients
+    monkeypatch.setattr(settings, "idempotency_lock_timeout", -1)
+
+    async def taken_over(lines):
+        # Another request takes over the (now abandoned) claim meanwhile
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            assert await IdempotencyService(session).claim("bill-4", "hash") is None
+
+    mock_prod.reserve_stock.side_effect = taken_over
+    headers = {"Idempotency-Key": "bill-4"}
+    resp = client.post("/api/bills", json=PAYLOAD, headers=headers)
+
+    assert resp.status_code == 409
+    mock_prod.release_stock.assert_awaited_once_with([(10, 2)])
+    assert client.get("/api/bills").json() == []
+
+
+async def test_completion_is_committed_with_the_request(file_engine):
+    async with AsyncSession(file_engine, expire_on_commit=False) as session:
+        service = IdempotencyService(session)
+        assert await service.claim("tx", "hash") is None
+        await service.complete("tx", None, 201, "{}")
+        await session.rollback()
+
+        # Not stored: the claim is still unfinished, and ours to release
+        await service.release("tx")
+        assert await service.claim("tx", "hash") is None
+
+
+async def test_complete_without_claim_is_a_conflict(file_engine):
+    async with AsyncSession(file_engine, expire_on_commit=False) as session:
+        with pytest.raises(HTTPException) as exc:
+            await IdempotencyService(session).complete("missing", None, 201, "{}")
+
+    assert exc.value.status_code == 409
+
+
+@pytest.fixture
+async def file_engine(tmp_path):
+    """Separate connections, so concurrent sessions really interleave"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'idempotency.db'}",
+        connect_args={"timeout": 30},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def test_duplicate_waits_for_in_flight_request(file_engine, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_poll_interval", 0.01)
+
+    async with AsyncSession(file_engine, expire_on_commit=False) as owner_session:
+        owner = IdempotencyService(owner_session)
+        assert await owner.claim("dup", "hash") is None
+
+        async def duplicate():
+            async with AsyncSession(file_engine, expire_on_commit=False) as session:
+                return await IdempotencyService(session).claim("dup", "hash")
+
+        waiting = asyncio.create_task(duplicate())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        await owner.complete("dup", None, 201, '{"id": 7}')
+        await owner_session.commit()
+        stored = await asyncio.wait_for(waiting, timeout=5)
+
+    assert stored.status_code == 201
+    assert stored.response_body == '{"id": 7}'
+
+
+async def test_duplicate_gives_up_after_wait_timeout(file_engine, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_wait_timeout", 0.05)
+    monkeypatch.setattr(settings, "idempotency_poll_interval", 0.01)
+
+    async with AsyncSession(file_engine, expire_on_commit=False) as session:
+        assert await IdempotencyService(session).claim("slow", "hash") is None
+    async with AsyncSession(file_engine, expire_on_commit=False) as session:
+        with pytest.raises(HTTPException) as exc:
+            await IdempotencyService(session).claim("slow", "hash")
+
+    assert exc.value.status_code == 409
+
+
+async def test_expired_key_can_be_claimed_again(file_engine, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_key_ttl", -1)
+
+    async with AsyncSession(file_engine, expire_on_commit=False) as session:
+        service = IdempotencyService(session)
+        assert await service.claim("old", "hash") is None
+        await service.complete("old", None, 201, "{}")
+        await session.commit()
+
+        assert await service.claim("old", "other-hash") is None
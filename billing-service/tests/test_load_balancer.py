@@ -0,0 +1,70 @@
+from collections import Counter
+
+import pytest
+
+from app.load_balancer import LoadBalancer
+
+
+def _record(balancer, instance, latency):
+    with balancer.track(instance):
+        pass
+    # Overwrite the measured sample with a deterministic latency
+    balancer._stats[instance].ewma = latency
+
+
+def test_choose_prefers_fast_instances():
+    balancer = LoadBalancer()
+    instances = ["http://fast:1", "http://slow:1"]
+    _record(balancer, "http://fast:1", 0.01)
+    _record(balancer, "http://slow:1", 0.5)
+
+    picks = Counter(balancer.choose(instances) for _ in range(200))
+
+    # With two instances both are always compared, so the fast one wins
+    assert picks == {"http://fast:1": 200}
+
+
+def test_slow_replica_gets_less_traffic():
+    balancer = LoadBalancer()
+    instances = ["http://a:1", "http://b:1", "http://slow:1"]
+    _record(balancer, "http://a:1", 0.01)
+    _record(balancer, "http://b:1", 0.01)
+    _record(balancer, "http://slow:1", 1.0)
+
+    picks = Counter(balancer.choose(instances) for _ in range(300))
+
+    # The slow replica loses every comparison it takes part in
+    assert picks["http://slow:1"] == 0
+    assert picks["http://a:1"] > 0 and picks["http://b:1"] > 0
+
+
+def test_in_flight_calls_steer_traffic_away():
+    balancer = LoadBalancer()
+    _record(balancer, "http://a:1", 0.01)
+    _record(balancer, "http://b:1", 0.01)
+
+    with balancer.track("http://a:1"), balancer.track("http://a:1"):
+        assert balancer.stats("http://a:1").in_flight == 2
+        assert balancer.choose(["http://a:1", "http://b:1"]) == "http://b:1"
+
+    assert balancer.stats("http://a:1").in_flight == 0
+
+
+def test_failed_calls_are_penalized(monkeypatch):
+    from app.load_balancer import settings
+
+    monkeypatch.setattr(settings, "lb_error_penalty", 2.0)
+    balancer = LoadBalancer()
+
+    with pytest.raises(RuntimeError):
+        with balancer.track("http://a:1"):
+            raise RuntimeError("connection reset")
+    assert balancer.stats("http://a:1").ewma == 2.0
+
+    with balancer.track("http://b:1") as call:
+        call.failed = True
+    assert balancer.stats("http://b:1").ewma == 2.0
+
+
+def test_single_instance_is_returned_directly():
+    assert LoadBalancer().choose(["http://only:1"]) == "http://only:1"
@@ -0,0 +1,170 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import database
+from app.clients.products_client import StockReservationError
+from app.config import settings
+from app.models import BillCreate, BillItemCreate, OutboxEvent
+from app.services import outbox_worker as outbox_module
+from app.services.billing_service import BillingService
+from app.services.outbox_worker import OutboxWorker
+
+
+@pytest.fixture
+def worker(monkeypatch, engine):
+    monkeypatch.setattr(database, "engine", engine)
+    return OutboxWorker()
+
+
+async def _submit(session, *product_ids, customer_id=1):
+    bill_data = BillCreate(
+        customer_id=customer_id,
+        items=[BillItemCreate(product_id=pid, quantity=2) for pid in product_ids],
+    )
+    return await BillingService(session).submit_bill(bill_data)
+
+
+async def _make_due(session):
+    await session.exec(update(OutboxEvent).values(next_attempt_at=datetime.now()))
+    await session.commit()
+
+
+async def _reload(engine, bill_id):
+    async with AsyncSession(engine) as session:
+        return await BillingService(session).get_bill(bill_id)
+
+
+async def test_async_mode_returns_202_without_downstream_calls(
+    client, worker, mock_external_clients
+):
+    mock_cust, mock_prod = mock_external_clients
+    payload = {"customer_id": 1, "items": [{"product_id": 10, "quantity": 3}]}
+
+    resp = client.post("/api/bills?mode=async", json=payload)
+
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status"] == "pending"
+    assert resp.headers["Location"] == body["status_url"] == f"/api/bills/{body['id']}"
+    mock_cust.get_customers.assert_not_awaited()
+    mock_prod.reserve_stock.assert_not_awaited()
+    assert client.get(body["status_url"]).json()["status"] == "pending"
+
+    assert await worker.run_once() == 1
+
+    settled = client.get(body["status_url"]).json()
+    assert settled["status"] == "completed"
+    assert float(settled["total_amount"]) == 30.0
+    mock_prod.reserve_stock.assert_awaited_once_with([(10, 3)])
+
+
+async def test_worker_reserves_a_batch_in_one_call(
+    engine, session, worker, mock_external_clients
+):
+    _, mock_prod = mock_external_clients
+    bills = [await _submit(session, 1, 2), await _submit(session, 3)]
+
+    assert await worker.run_once() == 2
+
+    mock_prod.reserve_stock.assert_awaited_once_with([(1, 2), (2, 2), (3, 2)])
+    for bill in bills:
+        assert (await _reload(engine, bill.id)).status == "completed"
+    events = (await session.exec(select(OutboxEvent))).all()
+    assert {event.status for event in events} == {"done"}
+    assert await worker.run_once() == 0
+
+
+async def test_worker_falls_back_to_one_reservation_per_bill(
+    engine, session, worker, mock_external_clients
+):
+    mock_cust, mock_prod = mock_external_clients
+
+    async def reserve(lines):
+        if any(product_id == 13 for product_id, _ in lines):
+            raise StockReservationError("Insufficient stock for product 13")
+        return []
+
+    mock_prod.reserve_stock.side_effect = reserve
+    ok = await _submit(session, 1)
+    short = await _submit(session, 13)
+    mock_cust.get_customers.side_effect = lambda ids: {
+        i: {"id": i} for i in ids if i != 99
+    }
+    unknown = await _submit(session, 2, customer_id=99)
+
+    await worker.run_once()
+
+    # Batch call, then one call per valid bill (the unknown customer is skipped)
+    assert mock_prod.reserve_stock.await_count == 3
+    assert (await _reload(engine, ok.id)).status == "completed"
+    failed = await _reload(engine, short.id)
+    assert failed.status == "failed"
+    assert "Insufficient stock" in failed.failure_reason
+    assert "Customer" in (await _reload(engine, unknown.id)).failure_reason
+
+
+async def test_worker_backs_off_then_gives_up_on_errors(
+    engine, session, worker, monkeypatch, mock_external_clients
+):
+    _, mock_prod = mock_external_clients
+    mock_prod.reserve_stock.side_effect = Exception("Inventory Service is unavailable")
+    monkeypatch.setattr(settings, "outbox_max_attempts", 2)
+    monkeypatch.setattr(settings, "outbox_batch_size", 1)
+    bill = await _submit(session, 1)
+
+    # A failed pass reports nothing settled, so the loop sleeps before retrying
+    assert await worker.run_once() == 0
+    assert (await _reload(engine, bill.id)).status == "pending"
+
+    # The event is not due again until its backoff has passed
+    assert await worker.run_once() == 0
+    assert mock_prod.reserve_stock.await_count == 1
+    event = (await session.exec(select(OutboxEvent))).one()
+    assert event.attempts == 1
+    delay = (event.next_attempt_at - datetime.now()).total_seconds()
+    assert 0 < delay <= settings.outbox_retry_backoff
+
+    await _make_due(session)
+    await worker.run_once()
+    failed = await _reload(engine, bill.id)
+    assert failed.status == "failed"
+    assert "unavailable" in failed.failure_reason
+    await _make_due(session)
+    assert await worker.run_once() == 0
+    assert mock_prod.reserve_stock.await_count == 2
+
+
+def test_retry_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "outbox_retry_backoff", 5.0)
+    monkeypatch.setattr(settings, "outbox_retry_backoff_max", 30.0)
+    event = OutboxEvent(bill_id=1)
+    delays = []
+    for _ in range(5):
+        before = datetime.now()
+        OutboxWorker._record_failure([event], [], "down")
+        delays.append(round((event.next_attempt_at - before).total_seconds()))
+
+    assert delays == [5, 10, 20, 30, 30]
+
+
+async def test_worker_releases_stock_when_saving_fails(
+    engine, session, worker, monkeypatch, mock_external_clients
+):
+    _, mock_prod = mock_external_clients
+    bill = await _submit(session, 5)
+
+    class FailingSession(AsyncSession):
+        async def commit(self):
+            raise RuntimeError("database went away")
+
+    monkeypatch.setattr(outbox_module, "AsyncSession", FailingSession)
+
+    with pytest.raises(RuntimeError):
+        await worker.run_once()
+
+    mock_prod.release_stock.assert_awaited_once_with([(5, 2)])
+    assert (await _reload(engine, bill.id)).status == "pending"
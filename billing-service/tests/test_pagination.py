@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    stamp = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor({"bill_date": stamp.isoformat(), "id": 42})
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, bill_date=datetime.fromisoformat, id=int) == (stamp, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "!!!", encode_cursor({"other": 1}), encode_cursor({"id": "abc"})],
+)
+def test_invalid_cursors(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, id=int)
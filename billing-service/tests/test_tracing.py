@@ -0,0 +1,118 @@
+import json
+
+import httpx
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app import tracing
+from app.clients.http_client import HTTPClient
+from app.tracing import trace_engine
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    # The global provider can only be installed once per process
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return exporter
+
+
+@pytest.fixture
+def spans(exporter):
+    exporter.clear()
+    return exporter
+
+
+def _by_name(spans):
+    return {span.name: span for span in spans.get_finished_spans()}
+
+
+def test_create_bill_stages_join_the_caller_trace(
+    client, engine, mock_external_clients, spans
+):
+    trace_engine(engine)
+
+    response = client.post(
+        "/api/bills",
+        json={"customer_id": 1, "items": [{"product_id": 10, "quantity": 1}]},
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+
+    assert response.status_code == 201
+    finished = _by_name(spans)
+    server = finished["POST /api/bills"]
+    assert format(server.parent.span_id, "016x") == PARENT_ID
+    assert server.attributes["http.route"] == "/api/bills"
+    assert server.attributes["http.response.status_code"] == 201
+
+    stages = [
+        "create_bill.validate",
+        "create_bill.reserve_stock",
+        "create_bill.price",
+        "create_bill.commit",
+    ]
+    for name in stages:
+        assert finished[name].parent.span_id == finished["create_bill"].context.span_id
+    assert finished["create_bill"].parent.span_id == server.context.span_id
+    assert finished["db INSERT"].attributes["db.system"] == "sqlite"
+    assert all(
+        format(span.context.trace_id, "032x") == TRACE_ID
+        for span in spans.get_finished_spans()
+    )
+
+
+async def test_downstream_requests_carry_traceparent(spans):
+    sent = []
+
+    def dispatch(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(503)
+
+    client = HTTPClient()
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(dispatch))
+
+    await client.request(
+        "GET",
+        "http://inventory",
+        "/products/1",
+        service="inventory-service",
+        headers={"If-None-Match": '"1.1"'},
+    )
+
+    span = _by_name(spans)["GET inventory-service"]
+    trace_id = format(span.context.trace_id, "032x")
+    span_id = format(span.context.span_id, "016x")
+    assert sent[0].headers["traceparent"].startswith(f"00-{trace_id}-{span_id}-")
+    assert sent[0].headers["if-none-match"] == '"1.1"'
+    assert span.kind == trace.SpanKind.CLIENT
+    assert span.attributes["http.response.status_code"] == 503
+    assert span.status.status_code == trace.StatusCode.ERROR
+
+
+def test_file_exporter_writes_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.settings, "tracing_exporter", "file")
+    monkeypatch.setattr(tracing.settings, "tracing_file", str(path))
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(tracing._exporter()))
+
+    with provider.get_tracer("test").start_as_current_span("outer"):
+        with provider.get_tracer("test").start_as_current_span("inner"):
+            pass
+    provider.shutdown()
+    trace_file = tracing._trace_file
+    tracing.shutdown_tracing()
+
+    assert trace_file.closed
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["inner", "outer"]
@@ -0,0 +1,130 @@
+import json
+from typing import Any, AsyncIterator, List, Tuple
+from fastapi import Request
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.config import settings
+from app.models import BulkImportResult, BulkImportRowError, CustomerCreate
+
+
+class InvalidImportBody(ValueError):
+    """Raised when a bulk import body is neither a JSON array nor NDJSON"""
+
+
+class BulkImportAborted(Exception):
+    """Raised in `fail` mode on the first rejected row; nothing is kept"""
+
+    def __init__(self, result: BulkImportResult):
+        super().__init__("Bulk import aborted")
+        self.result = result
+
+
+async def read_rows(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (row number, raw row) pairs from a JSON array body, or from an
+    NDJSON body (Content-Type application/x-ndjson) as it streams in.
+    NDJSON rows are yielded as undecoded lines and numbered by line.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            raise InvalidImportBody("Body is not valid JSON")
+        if not isinstance(rows, list):
+            raise InvalidImportBody("Body must be a JSON array of customers")
+        for number, row in enumerate(rows, start=1):
+            yield number, row
+        return
+
+    number = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+async def import_customers(
+    session: AsyncSession,
+    rows: AsyncIterator[Tuple[int, Any]],
+    on_conflict: str = "skip",
+) -> BulkImportResult:
+    """
+    Validate rows with CustomerCreate and insert them in chunks of
+    `settings.bulk_import_chunk_size` (one multi-row INSERT each).
+
+    - "skip": invalid rows and existing emails are reported and skipped;
+      each chunk is committed as it is written.
+    - "fail": the whole import is one transaction, aborted (BulkImportAborted)
+      at the first invalid or conflicting row.
+    """
+    result = BulkImportResult()
+    chunk: List[Tuple[int, CustomerCreate]] = []
+
+    async for number, raw in rows:
+        try:
+            if isinstance(raw, bytes):
+                customer = CustomerCreate.model_validate_json(raw)
+            else:
+                customer = CustomerCreate.model_validate(raw)
+        except ValidationError as e:
+            result.errors.append(BulkImportRowError(row=number, error=_summary(e)))
+            if on_conflict == "fail":
+                raise BulkImportAborted(result)
+            continue
+
+        chunk.append((number, customer))
+        if len(chunk) >= settings.bulk_import_chunk_size:
+            await _write_chunk(session, chunk, result, on_conflict)
+            chunk = []
+
+    await _write_chunk(session, chunk, result, on_conflict)
+    if on_conflict == "fail":
+        await session.commit()
+    return result
+
+
+async def _write_chunk(
+    session: AsyncSession,
+    chunk: List[Tuple[int, CustomerCreate]],
+    result: BulkImportResult,
+    on_conflict: str,
+):
+    if not chunk:
+        return
+    inserted = await crud.bulk_insert_customers(
+        session, [customer for _, customer in chunk]
+    )
+    for number, customer in chunk:
+        if customer.email in inserted:
+            # A repeated email only counts for its first row
+            inserted.discard(customer.email)
+            result.inserted += 1
+        else:
+            result.conflicts.append(
+                BulkImportRowError(
+                    row=number,
+                    email=customer.email,
+                    error="Email already registered",
+                )
+            )
+
+    if on_conflict == "fail":
+        if result.conflicts:
+            raise BulkImportAborted(result)
+    else:
+        await session.commit()
+
+
+def _summary(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
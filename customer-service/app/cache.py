@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Returned by TTLCache.get when a key is absent or expired, so that None can
+# itself be cached (e.g. negative lookups).
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a TTL.
+    Each entry may override the default TTL (e.g. short-lived negative
+    entries). Hit, miss and eviction counters are kept for observability.
+
+    A loader that reads the source of truth should take a `generation()`
+    before reading and pass it to `set`: if the key was invalidated in the
+    meantime, the value it read may predate that write and is not cached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by every invalidation; the generation each key was last
+        # invalidated at is kept for up to `maxsize` keys, beyond which
+        # loads that started before `_untracked_before` are all treated
+        # as stale
+        self._generation = 0
+        self._invalidated_at: Dict[Hashable, int] = {}
+        self._untracked_before = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or MISSING if absent or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return MISSING
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self) -> int:
+        """Current invalidation generation (take it before loading a value)"""
+        with self._lock:
+            return self._generation
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ):
+        """
+        Store a value, evicting the least recently used entry when full.
+        With `generation`, nothing is stored if `key` was invalidated since.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and (
+                generation < self._untracked_before
+                or self._invalidated_at.get(key, 0) > generation
+            ):
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._invalidated_at[key] = self._generation
+            if len(self._invalidated_at) > self.maxsize:
+                self._forget_invalidations()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._forget_invalidations()
+
+    def _forget_invalidations(self):
+        self._invalidated_at.clear()
+        self._untracked_before = self._generation
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,34 +1,124 @@
-from typing import List, Optional
-from sqlmodel import Session, select
+from typing import List, Optional, Set
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.cache import MISSING, TTLCache
+from app.config import settings
 from app.models import Customer, CustomerCreate, CustomerUpdate
 
+# Read-through cache for get_customer (detached copies keyed by id). Writes
+# through this module invalidate it; other replicas' copies expire after the TTL.
+customer_cache = TTLCache(
+    maxsize=settings.customer_cache_size, ttl=settings.customer_cache_ttl
+)
 
-def get_customer(session: Session, customer_id: int) -> Optional[Customer]:
-    """Get a customer by ID"""
-    return session.get(Customer, customer_id)
 
+async def get_customer(session: AsyncSession, customer_id: int) -> Optional[Customer]:
+    """Get a customer by ID (served from the in-process cache when possible)"""
+    cached = customer_cache.get(customer_id)
+    if cached is not MISSING:
+        return cached
+    # An update committed while we read invalidates the key; the generation
+    # keeps our possibly older copy from being cached after that
+    generation = customer_cache.generation()
+    customer = await session.get(Customer, customer_id)
+    if customer is not None:
+        # Cache a copy that is not tied to this session
+        customer_cache.set(
+            customer_id, Customer.model_validate(customer), generation=generation
+        )
+    return customer
 
-def get_customers(session: Session, skip: int = 0, limit: int = 100) -> List[Customer]:
-    """Get a list of customers with pagination"""
-    statement = select(Customer).offset(skip).limit(limit)
-    results = session.exec(statement)
+
+async def get_customer_version(
+    session: AsyncSession, customer_id: int
+) -> Optional[int]:
+    """Get only a customer's version (enough to answer a conditional GET)"""
+    cached = customer_cache.get(customer_id)
+    if cached is not MISSING:
+        return cached.version
+    results = await session.exec(
+        select(Customer.version).where(Customer.id == customer_id)
+    )
+    return results.first()
+
+
+async def get_customers(
+    session: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+) -> List[Customer]:
+    """
+    Get a list of customers ordered by id.
+    With `after_id` (keyset pagination) the page starts right after that id,
+    which stays cheap however deep the page is; otherwise `skip` is used.
+    """
+    statement = select(Customer).order_by(Customer.id)
+    if after_id is not None:
+        statement = statement.where(Customer.id > after_id)
+    else:
+        statement = statement.offset(skip)
+    results = await session.exec(statement.limit(limit))
+    return results.all()
+
+
+async def get_customers_by_ids(
+    session: AsyncSession, customer_ids: List[int]
+) -> List[Customer]:
+    """Get several customers with a single primary-key IN (...) query"""
+    if not customer_ids:
+        return []
+    statement = (
+        select(Customer)
+        .where(Customer.id.in_(set(customer_ids)))
+        .order_by(Customer.id)
+    )
+    results = await session.exec(statement)
     return results.all()
 
 
-def create_customer(session: Session, customer: CustomerCreate) -> Customer:
+async def create_customer(session: AsyncSession, customer: CustomerCreate) -> Customer:
     """Create a new customer"""
     db_customer = Customer.model_validate(customer)
     session.add(db_customer)
-    session.commit()
-    session.refresh(db_customer)
+    await session.commit()
+    await session.refresh(db_customer)
     return db_customer
 
 
-def update_customer(
-    session: Session, customer_id: int, customer_data: CustomerUpdate
+async def bulk_insert_customers(
+    session: AsyncSession, customers: List[CustomerCreate]
+) -> Set[str]:
+    """
+    Insert many customers with one multi-row INSERT ... ON CONFLICT (email)
+    DO NOTHING RETURNING email, without committing.
+    Returns the emails that were inserted; the others already existed (or
+    appeared earlier in the same batch).
+    """
+    if not customers:
+        return set()
+    insert = _DIALECT_INSERTS[session.bind.dialect.name]
+    statement = (
+        insert(Customer)
+        .values([customer.model_dump() for customer in customers])
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(Customer.email)
+    )
+    results = await session.exec(statement)
+    return set(results.scalars().all())
+
+
+# Dialects supporting INSERT ... ON CONFLICT DO NOTHING
+_DIALECT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+async def update_customer(
+    session: AsyncSession, customer_id: int, customer_data: CustomerUpdate
 ) -> Optional[Customer]:
     """Update an existing customer"""
-    db_customer = session.get(Customer, customer_id)
+    db_customer = await session.get(Customer, customer_id)
     if not db_customer:
         return None
     
@@ -36,19 +126,23 @@ def update_customer(
     customer_dict = customer_data.model_dump(exclude_unset=True)
     for key, value in customer_dict.items():
         setattr(db_customer, key, value)
+    # Bumped in SQL, so concurrent writes cannot both store the same version
+    db_customer.version = Customer.version + 1
     
     session.add(db_customer)
-    session.commit()
-    session.refresh(db_customer)
+    await session.commit()
+    customer_cache.delete(customer_id)
+    await session.refresh(db_customer)
     return db_customer
 
 
-def delete_customer(session: Session, customer_id: int) -> bool:
+async def delete_customer(session: AsyncSession, customer_id: int) -> bool:
     """Delete a customer"""
-    db_customer = session.get(Customer, customer_id)
+    db_customer = await session.get(Customer, customer_id)
     if not db_customer:
         return False
     
-    session.delete(db_customer)
-    session.commit()
+    await session.delete(db_customer)
+    await session.commit()
+    customer_cache.delete(customer_id)
     return True
\ No newline at end of file
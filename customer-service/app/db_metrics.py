@@ -0,0 +1,115 @@
+import time
+from typing import Optional, Type
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+
+class PoolMetrics:
+    """
+    Live counters for connection checkouts from the engine's pool.
+
+    A checkout is timed from the moment the engine asks the pool for a
+    connection (on a session's first statement) until it holds one
+    (pre-ping and opening a new connection included). It counts as a wait
+    when the pool had no idle connection to hand out, i.e. the caller had
+    to open one or queue for `db_pool_timeout`. Opening new connections is
+    timed separately.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.checkout_time = 0.0
+        self.checkout_time_max = 0.0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_time = 0.0
+        self.connect_time_max = 0.0
+
+    def pool_class(self, base: Type[Pool] = AsyncAdaptedQueuePool) -> Type[Pool]:
+        """A subclass of `base` that times every checkout into these counters"""
+        metrics = self
+
+        class TimedPool(base):
+            def connect(self):
+                return metrics._timed_checkout(self, super().connect)
+
+        TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+        return TimedPool
+
+    def instrument(self, engine: AsyncEngine):
+        """Time the opening of new connections (dialect connect events)"""
+
+        @event.listens_for(engine.sync_engine, "do_connect")
+        def _connecting(dialect, connection_record, cargs, cparams):
+            connection_record.info["connect_started_at"] = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _connected(dbapi_connection, connection_record):
+            started_at = connection_record.info.pop("connect_started_at", None)
+            if started_at is None:
+                return
+            elapsed = time.perf_counter() - started_at
+            self.connects += 1
+            self.connect_time += elapsed
+            self.connect_time_max = max(self.connect_time_max, elapsed)
+
+    def _timed_checkout(self, pool: Pool, connect):
+        idle = self._call(pool, "checkedin")
+        start = time.perf_counter()
+        try:
+            connection = connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - start
+
+        self.checkouts += 1
+        self.checkout_time += elapsed
+        self.checkout_time_max = max(self.checkout_time_max, elapsed)
+        if idle == 0:
+            self.waits += 1
+            self.wait_time += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+        return connection
+
+    def snapshot(self, pool: Pool) -> dict:
+        """Current pool occupancy plus the counters since startup"""
+        return {
+            "pool": type(pool).__name__,
+            "size": self._call(pool, "size"),
+            "checked_in": self._call(pool, "checkedin"),
+            "checked_out": self._call(pool, "checkedout"),
+            "overflow": self._call(pool, "overflow"),
+            "checkouts": self.checkouts,
+            "checkout_latency_avg_ms": self._ms(self.checkout_time, self.checkouts),
+            "checkout_latency_max_ms": round(self.checkout_time_max * 1000, 3),
+            "waits": self.waits,
+            "wait_time_avg_ms": self._ms(self.wait_time, self.waits),
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "connect_time_avg_ms": self._ms(self.connect_time, self.connects),
+            "connect_time_max_ms": round(self.connect_time_max * 1000, 3),
+        }
+
+    @staticmethod
+    def _call(pool: Pool, name: str) -> Optional[int]:
+        # Only QueuePool-style pools report size/overflow (not e.g. StaticPool)
+        method = getattr(pool, name, None)
+        return method() if callable(method) else None
+
+    @staticmethod
+    def _ms(total: float, count: int) -> float:
+        return round(total / count * 1000, 3) if count else 0.0
+
+
+# Global instance
+pool_metrics = PoolMetrics()
@@ -1,7 +1,10 @@
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import create_db_and_tables
+from app.crud import customer_cache
+from app.database import create_db_and_tables, db_metrics
+from app.metrics import PrometheusMiddleware, metrics_response
+from app.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from app.consul_client import consul_client
 from app.routers import customers
 from app.config import settings
@@ -12,12 +15,14 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     print("🚀 Starting Customer Service...")
-    create_db_and_tables()
+    setup_tracing()
+    await create_db_and_tables()
     consul_client.register_service()
     yield
     # Shutdown
     print("🛑 Shutting down Customer Service...")
     consul_client.deregister_service()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -27,6 +32,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Per-route latency, status and in-flight metrics (served at /metrics)
+app.add_middleware(PrometheusMiddleware)
+# Server span per request, continuing the caller's trace (W3C traceparent)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(customers.router, prefix="/api")
 
@@ -37,6 +47,24 @@ def health_check():
     return {"status": "healthy", "service": settings.service_name}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
+
+@app.get("/metrics/db")
+def database_metrics():
+    """Connection pool occupancy, checkout latency and wait time"""
+    return db_metrics()
+
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Customer cache size, hit/miss/eviction counters and hit rate"""
+    return customer_cache.stats()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -0,0 +1,117 @@
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import Response
+from starlette.routing import Match
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Database statement execution time",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# Label values for DB operations (anything else is reported as OTHER)
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that will serve the request, e.g.
+    "/api/customers/{customer_id}". Templates keep the label set bounded;
+    requests matching no route are grouped as "unmatched".
+    """
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class PrometheusMiddleware:
+    """
+    Plain ASGI middleware recording per-route latency, status codes and
+    in-flight requests. It does not buffer bodies (unlike BaseHTTPMiddleware),
+    so streaming responses are unaffected and the overhead stays small.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            in_progress.dec()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Time every statement the engine executes (cursor execute events)"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info["query_started_at"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_STATEMENT_LATENCY.labels(
+            operation if operation in _DB_OPERATIONS else "OTHER"
+        ).observe(time.perf_counter() - started_at)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is None:
+            return
+        started = context.connection.info.get("query_started_at")
+        if started:
+            started.pop()
+
+
+def metrics_response() -> Response:
+    """Current metrics in the Prometheus text exposition format"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
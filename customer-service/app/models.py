@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from sqlmodel import SQLModel, Field
 from pydantic import EmailStr
 
@@ -12,6 +12,8 @@ class CustomerBase(SQLModel):
 class Customer(CustomerBase, table=True):
     """Customer database model"""
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Bumped by every update; the ETag of GET /customers/{id} is built from it
+    version: int = Field(default=1)
 
 
 class CustomerCreate(CustomerBase):
@@ -27,4 +29,29 @@ class CustomerRead(CustomerBase):
 class CustomerUpdate(SQLModel):
     """Schema for updating a customer (all fields optional)"""
     name: Optional[str] = Field(default=None, min_length=1, max_length=100)
-    email: Optional[EmailStr] = None
\ No newline at end of file
+    email: Optional[EmailStr] = None
+
+
+class CustomerBatchRequest(SQLModel):
+    """Ids to fetch in one call (duplicates are ignored)"""
+    ids: List[int] = Field(max_length=1000)
+
+
+class CustomerBatchResponse(SQLModel):
+    """Customers found, plus the requested ids that do not exist"""
+    customers: List[CustomerRead]
+    missing: List[int]
+
+
+class BulkImportRowError(SQLModel):
+    """A row of a bulk import that was not inserted"""
+    row: int  # 1-based position (line number for NDJSON)
+    email: Optional[str] = None
+    error: str
+
+
+class BulkImportResult(SQLModel):
+    """Summary of a bulk import; only rows that were not inserted are listed"""
+    inserted: int = 0
+    conflicts: List[BulkImportRowError] = []
+    errors: List[BulkImportRowError] = []
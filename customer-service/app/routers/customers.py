@@ -1,40 +1,137 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from typing import List, Literal, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.database import get_session
-from app.models import CustomerCreate, CustomerRead, CustomerUpdate
+from app.models import (
+    BulkImportResult,
+    CustomerBatchRequest,
+    CustomerBatchResponse,
+    CustomerCreate,
+    CustomerRead,
+    CustomerUpdate,
+)
 from app import crud
+from app.config import settings
+from app.bulk_import import (
+    BulkImportAborted,
+    InvalidImportBody,
+    import_customers,
+    read_rows,
+)
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 
+def customer_etag(customer_id: int, version: int) -> str:
+    """Strong ETag of a customer; it changes whenever an update bumps the version"""
+    return f'"{customer_id}.{version}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check an If-None-Match header (a list of tags, or *) against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+def cache_headers(etag: str) -> dict:
+    # Clients may reuse a response for max-age seconds, then must revalidate
+    return {
+        "ETag": etag,
+        "Cache-Control": f"max-age={settings.read_cache_max_age}, must-revalidate",
+    }
+
+
 @router.get("", response_model=List[CustomerRead])
-def list_customers(
-    skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
 ):
-    """Get a list of all customers with pagination"""
-    customers = crud.get_customers(session, skip=skip, limit=limit)
+    """
+    Get a list of all customers with pagination.
+    When a page is full, its X-Next-Cursor header can be passed back as
+    `cursor` to fetch the next one (`skip` is still supported).
+    """
+    after_id = None
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, id=int)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    customers = await crud.get_customers(
+        session, skip=skip, limit=limit, after_id=after_id
+    )
+    if customers and len(customers) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": customers[-1].id})
     return customers
 
 
+@router.post("/batch", response_model=CustomerBatchResponse)
+async def get_customers_batch(
+    batch: CustomerBatchRequest, session: AsyncSession = Depends(get_session)
+):
+    """Get several customers at once; unknown ids are listed in `missing`"""
+    customers = await crud.get_customers_by_ids(session, batch.ids)
+    found = {customer.id for customer in customers}
+    missing = sorted(set(batch.ids) - found)
+    return CustomerBatchResponse(customers=customers, missing=missing)
+
+
 @router.get("/{customer_id}", response_model=CustomerRead)
-def get_customer(customer_id: int, session: Session = Depends(get_session)):
-    """Get a specific customer by ID"""
-    customer = crud.get_customer(session, customer_id)
+async def get_customer(
+    customer_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Get a specific customer by ID.
+    Callers sending the current ETag in If-None-Match get an empty 304,
+    answered from the version column alone without loading the customer.
+    """
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Customer with id {customer_id} not found",
+    )
+    if if_none_match:
+        version = await crud.get_customer_version(session, customer_id)
+        if version is None:
+            raise not_found
+        etag = customer_etag(customer_id, version)
+        if etag_matches(etag, if_none_match):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+            )
+
+    customer = await crud.get_customer(session, customer_id)
     if not customer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Customer with id {customer_id} not found",
-        )
+        raise not_found
+    response.headers.update(cache_headers(customer_etag(customer.id, customer.version)))
     return customer
 
 
 @router.post("", response_model=CustomerRead, status_code=status.HTTP_201_CREATED)
-def create_customer(customer: CustomerCreate, session: Session = Depends(get_session)):
+async def create_customer(
+    customer: CustomerCreate, session: AsyncSession = Depends(get_session)
+):
     """Create a new customer"""
     try:
-        db_customer = crud.create_customer(session, customer)
+        db_customer = await crud.create_customer(session, customer)
         return db_customer
     except Exception as e:
         raise HTTPException(
@@ -43,14 +140,45 @@ def create_customer(customer: CustomerCreate, session: Session = Depends(get_ses
         )
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_customers(
+    request: Request,
+    on_conflict: Literal["skip", "fail"] = "skip",
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Import many customers from a JSON array or an NDJSON stream
+    (Content-Type: application/x-ndjson).
+    With `on_conflict=skip`, invalid rows and already registered emails are
+    reported and skipped. With `on_conflict=fail`, the first one aborts the
+    whole import (409 for a duplicate email, 422 for an invalid row) and
+    nothing is inserted.
+    """
+    try:
+        return await import_customers(session, read_rows(request), on_conflict)
+    except InvalidImportBody as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except BulkImportAborted as e:
+        await session.rollback()
+        e.result.inserted = 0
+        raise HTTPException(
+            status_code=(
+                status.HTTP_409_CONFLICT
+                if e.result.conflicts
+                else status.HTTP_422_UNPROCESSABLE_CONTENT
+            ),
+            detail=e.result.model_dump(),
+        )
+
+
 @router.put("/{customer_id}", response_model=CustomerRead)
-def update_customer(
+async def update_customer(
     customer_id: int,
     customer_data: CustomerUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     """Update an existing customer"""
-    updated_customer = crud.update_customer(session, customer_id, customer_data)
+    updated_customer = await crud.update_customer(session, customer_id, customer_data)
     if not updated_customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,9 +188,11 @@ def update_customer(
 
 
 @router.delete("/{customer_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_customer(customer_id: int, session: Session = Depends(get_session)):
+async def delete_customer(
+    customer_id: int, session: AsyncSession = Depends(get_session)
+):
     """Delete a customer"""
-    success = crud.delete_customer(session, customer_id)
+    success = await crud.delete_customer(session, customer_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,14 +1,24 @@
 import pytest
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app import database
+from app import crud, database
 from app import main as app_main
 from app.main import app
 
 
+@pytest.fixture(autouse=True)
+def clear_customer_cache():
+    """Each test gets a fresh database, so cached customers must not leak"""
+    crud.customer_cache.clear()
+    yield
+    crud.customer_cache.clear()
+
+
 @pytest.fixture
-def engine():
-    """Create a pure in-memory SQLite engine for tests using StaticPool.
+async def engine():
+    """Create a pure in-memory async SQLite engine for tests using StaticPool.
 
     Using StaticPool with :memory: keeps the same connection open and shared
     across threads, so the TestClient and sessions see the same DB without
@@ -16,21 +26,23 @@ def engine():
     """
     from sqlalchemy.pool import StaticPool
 
-    url = "sqlite:///:memory:"
-    engine = create_engine(
+    url = "sqlite+aiosqlite:///:memory:"
+    engine = create_async_engine(
         url,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
         pool_pre_ping=True,
     )
-    SQLModel.metadata.create_all(engine)
-    return engine
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
 
 
 @pytest.fixture
-def session(engine):
+async def session(engine):
     """Create a fresh session for a test."""
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -39,8 +51,8 @@ def client(monkeypatch, engine):
     """TestClient that overrides DB dependency and suppresses Consul registration."""
 
     # Override get_session dependency to use test engine
-    def get_session_override():
-        with Session(engine) as s:
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as s:
             yield s
 
     # Also replace the module-level engine used by the app so any code that
@@ -65,11 +77,14 @@ def client(monkeypatch, engine):
 
     # Prevent the real startup from registering with Consul and creating prod tables
     # Make startup a no-op (we'll create tables explicitly on the test engine)
-    monkeypatch.setattr(app_main, "create_db_and_tables", lambda: None)
+    async def create_db_and_tables_noop():
+        pass
+
+    monkeypatch.setattr(app_main, "create_db_and_tables", create_db_and_tables_noop)
 
-    # Ensure the module-level engine is our test engine and create tables on it
+    # Ensure the module-level engine is our test engine (tables were already
+    # created on it by the engine fixture)
     monkeypatch.setattr(database, "engine", engine)
-    SQLModel.metadata.create_all(engine)
 
     # Suppress consul register/deregister on the instance used by main
     try:
@@ -4,37 +4,37 @@ from app import crud
 from app.models import CustomerCreate, Customer
 
 
-def test_create_get_update_delete_customer(session):
+async def test_create_get_update_delete_customer(session):
     # create
     data = CustomerCreate(name="Alice", email="alice@example.com")
-    customer = crud.create_customer(session, data)
+    customer = await crud.create_customer(session, data)
     assert customer.id is not None
     assert customer.name == "Alice"
 
     # get
-    got = crud.get_customer(session, customer.id)
+    got = await crud.get_customer(session, customer.id)
     assert got is not None
     assert got.email == "alice@example.com"
 
     # update
     update = Customer(name="Alice B", email="aliceb@example.com")
-    updated = crud.update_customer(session, customer.id, update)
+    updated = await crud.update_customer(session, customer.id, update)
     assert updated.name == "Alice B"
 
     # delete
-    deleted = crud.delete_customer(session, customer.id)
+    deleted = await crud.delete_customer(session, customer.id)
     assert deleted is True
-    assert crud.get_customer(session, customer.id) is None
+    assert await crud.get_customer(session, customer.id) is None
 
 
-def test_get_customers_pagination(session):
+async def test_get_customers_pagination(session):
     # create 3
     for i in range(3):
-        crud.create_customer(
+        await crud.create_customer(
             session, CustomerCreate(name=f"U{i}", email=f"u{i}@example.com")
         )
 
-    lst = crud.get_customers(session, skip=0, limit=2)
+    lst = await crud.get_customers(session, skip=0, limit=2)
     assert len(lst) == 2
 
 
@@ -42,31 +42,31 @@ from app import crud
 from app.models import CustomerCreate
 
 
-def test_create_and_get_customer(session):
+async def test_create_and_get_customer(session):
     payload = CustomerCreate(name="Alice", email="alice@example.com")
-    created = crud.create_customer(session, payload)
+    created = await crud.create_customer(session, payload)
     assert created.id is not None
     assert created.name == "Alice"
     assert created.email == "alice@example.com"
 
-    fetched = crud.get_customer(session, created.id)
+    fetched = await crud.get_customer(session, created.id)
     assert fetched.id == created.id
 
 
-def test_get_customers_pagination(session):
+async def test_get_customers_pagination(session):
     # Clear any existing
     # Create 5 customers
     for i in range(5):
-        crud.create_customer(
+        await crud.create_customer(
             session, CustomerCreate(name=f"User{i}", email=f"user{i}@example.com")
         )
 
-    results = crud.get_customers(session, skip=0, limit=2)
+    results = await crud.get_customers(session, skip=0, limit=2)
     assert len(results) == 2
 
 
-def test_update_and_delete_customer(session):
-    created = crud.create_customer(
+async def test_update_and_delete_customer(session):
+    created = await crud.create_customer(
         session, CustomerCreate(name="Bob", email="bob@example.com")
     )
 
@@ -74,14 +74,116 @@ def test_update_and_delete_customer(session):
     from app.models import CustomerUpdate
 
     update_data = CustomerUpdate(name="Bobby")
-    updated = crud.update_customer(session, created.id, update_data)
+    updated = await crud.update_customer(session, created.id, update_data)
     assert updated.name == "Bobby"
     assert updated.email == "bob@example.com"
 
     # Delete
-    ok = crud.delete_customer(session, created.id)
+    ok = await crud.delete_customer(session, created.id)
     assert ok is True
 
     # Delete non-existent
-    ok2 = crud.delete_customer(session, 9999)
+    ok2 = await crud.delete_customer(session, 9999)
     assert ok2 is False
+
+
+async def test_get_customers_keyset(session):
+    created = [
+        await crud.create_customer(
+            session, CustomerCreate(name=f"K{i}", email=f"k{i}@example.com")
+        )
+        for i in range(5)
+    ]
+
+    page = await crud.get_customers(session, limit=2, after_id=created[1].id)
+    assert [c.id for c in page] == [created[2].id, created[3].id]
+
+
+async def test_get_customers_by_ids(session):
+    created = [
+        await crud.create_customer(
+            session, CustomerCreate(name=f"Id{i}", email=f"id{i}@ex.com")
+        )
+        for i in range(3)
+    ]
+
+    found = await crud.get_customers_by_ids(session, [created[2].id, created[0].id, 999])
+
+    assert [c.id for c in found] == [created[0].id, created[2].id]
+    assert await crud.get_customers_by_ids(session, []) == []
+
+
+async def test_get_customer_is_cached_and_invalidated(session):
+    created = await crud.create_customer(
+        session, CustomerCreate(name="Hot", email="hot@ex.com")
+    )
+
+    hits = crud.customer_cache.hits
+    first = await crud.get_customer(session, created.id)
+    second = await crud.get_customer(session, created.id)
+    assert second is not first  # served from the cache as a detached copy
+    assert second.name == "Hot"
+    assert crud.customer_cache.hits == hits + 1
+
+    from app.models import CustomerUpdate
+
+    await crud.update_customer(session, created.id, CustomerUpdate(name="Cold"))
+    updated = await crud.get_customer(session, created.id)
+    assert updated.name == "Cold"
+    assert await crud.get_customer_version(session, created.id) == 2
+
+    await crud.delete_customer(session, created.id)
+    assert await crud.get_customer(session, created.id) is None
+
+
+async def test_concurrent_updates_each_bump_the_version(engine, session):
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.models import CustomerUpdate
+
+    created = await crud.create_customer(
+        session, CustomerCreate(name="Race", email="race@example.com")
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as other:
+        # Both writers loaded version 1 before either of them wrote
+        await other.get(Customer, created.id)
+        await crud.update_customer(session, created.id, CustomerUpdate(name="A"))
+        updated = await crud.update_customer(
+            other, created.id, CustomerUpdate(name="B")
+        )
+
+    assert updated.version == 3
+    assert await crud.get_customer_version(session, created.id) == 3
+
+
+async def test_read_racing_an_update_is_not_cached(session, monkeypatch):
+    created = await crud.create_customer(
+        session, CustomerCreate(name="Old", email="race-cache@example.com")
+    )
+    crud.customer_cache.clear()
+    load = session.get
+
+    async def get_then_update(*args, **kwargs):
+        # An update commits and invalidates the key after our read
+        customer = await load(*args, **kwargs)
+        crud.customer_cache.delete(created.id)
+        return customer
+
+    monkeypatch.setattr(session, "get", get_then_update)
+    await crud.get_customer(session, created.id)
+
+    assert crud.customer_cache.get(created.id) is crud.MISSING
+
+
+def test_cache_forgets_old_invalidations_conservatively():
+    from app.cache import TTLCache
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    for key in range(3):
+        cache.delete(key)  # The third one drops the per-key bookkeeping
+
+    cache.set("other", "stale?", generation=generation)
+    cache.set("fresh", "ok", generation=cache.generation())
+
+    assert cache.get("other") is crud.MISSING
+    assert cache.get("fresh") == "ok"
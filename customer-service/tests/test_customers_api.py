@@ -8,10 +8,10 @@ from app import crud
 from app.models import CustomerCreate
 
 
-def test_list_customers_pagination(client, session):
+async def test_list_customers_pagination(client, session):
     # Seed data
     for i in range(4):
-        crud.create_customer(
+        await crud.create_customer(
             session, CustomerCreate(name=f"C{i}", email=f"c{i}@ex.com")
         )
 
@@ -22,8 +22,8 @@ def test_list_customers_pagination(client, session):
     assert len(data) == 2
 
 
-def test_get_single_customer(client, session):
-    created = crud.create_customer(
+async def test_get_single_customer(client, session):
+    created = await crud.create_customer(
         session, CustomerCreate(name="Sam", email="sam@ex.com")
     )
     resp = client.get(f"/api/customers/{created.id}")
@@ -33,12 +33,12 @@ def test_get_single_customer(client, session):
     assert body["name"] == "Sam"
 
 
-def test_get_not_found(client):
+async def test_get_not_found(client):
     resp = client.get("/api/customers/99999")
     assert resp.status_code == 404
 
 
-def test_create_customer_success(client, session):
+async def test_create_customer_success(client, session):
     payload = {"name": "New", "email": "new@ex.com"}
     resp = client.post("/api/customers", json=payload)
     assert resp.status_code == 201
@@ -47,21 +47,21 @@ def test_create_customer_success(client, session):
     assert "id" in body
 
 
-def test_create_customer_validation_error(client):
+async def test_create_customer_validation_error(client):
     payload = {"name": "", "email": "not-an-email"}
     resp = client.post("/api/customers", json=payload)
     assert resp.status_code == 422
 
 
-def test_create_duplicate_email(client, session):
-    crud.create_customer(session, CustomerCreate(name="A", email="dup@ex.com"))
+async def test_create_duplicate_email(client, session):
+    await crud.create_customer(session, CustomerCreate(name="A", email="dup@ex.com"))
     resp = client.post("/api/customers", json={"name": "B", "email": "dup@ex.com"})
     assert resp.status_code == 400
     assert "Error creating customer" in resp.json().get("detail", "")
 
 
-def test_update_customer(client, session):
-    created = crud.create_customer(
+async def test_update_customer(client, session):
+    created = await crud.create_customer(
         session, CustomerCreate(name="Up", email="up@ex.com")
     )
     resp = client.put(f"/api/customers/{created.id}", json={"name": "Updated"})
@@ -70,15 +70,163 @@ def test_update_customer(client, session):
     assert body["name"] == "Updated"
 
 
-def test_update_not_found(client):
+async def test_update_not_found(client):
     resp = client.put("/api/customers/99999", json={"name": "Nope"})
     assert resp.status_code == 404
 
 
-def test_delete_customer(client, session):
-    created = crud.create_customer(session, CustomerCreate(name="D", email="d@ex.com"))
+async def test_delete_customer(client, session):
+    created = await crud.create_customer(session, CustomerCreate(name="D", email="d@ex.com"))
     resp = client.delete(f"/api/customers/{created.id}")
     assert resp.status_code == 204
     # Verify it's gone
     get_resp = client.get(f"/api/customers/{created.id}")
     assert get_resp.status_code == 404
+
+
+async def test_list_customers_cursor_pagination(client, session):
+    created = [
+        await crud.create_customer(session, CustomerCreate(name=f"P{i}", email=f"p{i}@ex.com"))
+        for i in range(5)
+    ]
+
+    first = client.get("/api/customers?limit=3")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/api/customers?limit=3&cursor={cursor}")
+
+    ids = [c["id"] for c in first.json() + second.json()]
+    assert ids == [c.id for c in created]
+    # A partial page means there is nothing left to fetch
+    assert "X-Next-Cursor" not in second.headers
+
+
+async def test_list_customers_invalid_cursor(client):
+    resp = client.get("/api/customers?cursor=garbage")
+    assert resp.status_code == 400
+
+
+async def test_bulk_import_json_skips_conflicts(client, session, monkeypatch):
+    from app.config import settings
+
+    # Small chunks so the import spans several multi-row INSERTs
+    monkeypatch.setattr(settings, "bulk_import_chunk_size", 2)
+    await crud.create_customer(session, CustomerCreate(name="Old", email="old@ex.com"))
+    rows = [
+        {"name": "A", "email": "a@ex.com"},
+        {"name": "Old again", "email": "old@ex.com"},
+        {"name": "", "email": "bad"},
+        {"name": "B", "email": "b@ex.com"},
+        {"name": "A twice", "email": "a@ex.com"},
+    ]
+
+    resp = client.post("/api/customers/bulk", json=rows)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["inserted"] == 2
+    assert [(c["row"], c["email"]) for c in body["conflicts"]] == [
+        (2, "old@ex.com"),
+        (5, "a@ex.com"),
+    ]
+    assert [e["row"] for e in body["errors"]] == [3]
+    assert len(client.get("/api/customers").json()) == 3
+
+
+async def test_bulk_import_ndjson_stream(client):
+    lines = [
+        '{"name": "N1", "email": "n1@ex.com"}',
+        "",
+        "not json",
+        '{"name": "N2", "email": "n2@ex.com"}',
+    ]
+
+    resp = client.post(
+        "/api/customers/bulk",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["inserted"] == 2
+    assert [e["row"] for e in body["errors"]] == [3]
+
+
+async def test_bulk_import_fail_mode_is_all_or_nothing(client, session):
+    await crud.create_customer(session, CustomerCreate(name="Old", email="old@ex.com"))
+    rows = [
+        {"name": "A", "email": "a@ex.com"},
+        {"name": "Old again", "email": "old@ex.com"},
+    ]
+
+    resp = client.post("/api/customers/bulk?on_conflict=fail", json=rows)
+
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["conflicts"][0]["row"] == 2
+    assert resp.json()["detail"]["inserted"] == 0
+    assert len(client.get("/api/customers").json()) == 1
+
+
+async def test_bulk_import_rejects_non_array(client):
+    resp = client.post("/api/customers/bulk", json={"name": "A"})
+    assert resp.status_code == 400
+
+
+async def test_get_customers_batch(client, session):
+    a = await crud.create_customer(session, CustomerCreate(name="A", email="ba@ex.com"))
+    b = await crud.create_customer(session, CustomerCreate(name="B", email="bb@ex.com"))
+
+    resp = client.post("/api/customers/batch", json={"ids": [b.id, 99999, a.id, b.id]})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [c["id"] for c in body["customers"]] == [a.id, b.id]
+    assert body["missing"] == [99999]
+
+
+async def test_get_customer_conditional_get(client, session):
+    created = await crud.create_customer(
+        session, CustomerCreate(name="Etag", email="etag@ex.com")
+    )
+    url = f"/api/customers/{created.id}"
+
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "max-age=0, must-revalidate"
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    client.put(url, json={"name": "Etag renamed"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["name"] == "Etag renamed"
+
+    missing = client.get("/api/customers/99999", headers={"If-None-Match": etag})
+    assert missing.status_code == 404
+
+
+async def test_bulk_imported_customers_get_a_version(client):
+    client.post("/api/customers/bulk", json=[{"name": "Bulk", "email": "v@ex.com"}])
+    customer = client.get("/api/customers").json()[0]
+
+    resp = client.get(f"/api/customers/{customer['id']}")
+    assert resp.headers["ETag"] == f'"{customer["id"]}.1"'
+
+
+async def test_cache_metrics_endpoint(client, session):
+    created = await crud.create_customer(
+        session, CustomerCreate(name="M", email="m@ex.com")
+    )
+    before = client.get("/metrics/cache").json()
+    for _ in range(3):
+        client.get(f"/api/customers/{created.id}")
+
+    stats = client.get("/metrics/cache").json()
+    assert stats["hits"] - before["hits"] == 2
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["size"] == 1
+    assert 0 < stats["hit_rate"] <= 1
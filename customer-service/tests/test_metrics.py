@@ -0,0 +1,50 @@
+from prometheus_client import REGISTRY
+
+from app.metrics import instrument_engine
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template(client):
+    labels = {
+        "method": "GET",
+        "route": "/api/customers/{customer_id}",
+        "status": "404",
+    }
+    before = _sample("http_requests_total", **labels)
+
+    client.get("/api/customers/12345")
+    client.get("/api/customers/67890")
+
+    assert _sample("http_requests_total", **labels) == before + 2
+
+
+def test_unknown_paths_share_one_label(client):
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("http_requests_total", **labels)
+
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert _sample("http_requests_total", **labels) == before + 2
+
+
+def test_db_statements_are_timed(client, engine):
+    instrument_engine(engine)
+    before = _sample("db_statement_duration_seconds_count", operation="INSERT")
+
+    client.post("/api/customers", json={"name": "Ada", "email": "ada@example.com"})
+
+    assert _sample("db_statement_duration_seconds_count", operation="INSERT") > before
+
+
+def test_metrics_endpoint_exposes_text_format(client):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/health"' in response.text
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app import tracing
+from app.tracing import trace_engine
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    # The global provider can only be installed once per process
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return exporter
+
+
+@pytest.fixture
+def spans(exporter):
+    exporter.clear()
+    return exporter
+
+
+def test_requests_continue_the_caller_trace(client, engine, spans):
+    trace_engine(engine)
+
+    response = client.get(
+        "/api/customers/12345",
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+
+    assert response.status_code == 404
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    server = finished["GET /api/customers/{customer_id}"]
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+    assert format(server.parent.span_id, "016x") == PARENT_ID
+    assert server.kind == trace.SpanKind.SERVER
+    assert server.attributes["http.response.status_code"] == 404
+
+    query = finished["db SELECT"]
+    assert query.parent.span_id == server.context.span_id
+    assert query.attributes["db.query.text"].startswith("SELECT")
+
+
+def test_file_exporter_writes_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing.settings, "tracing_exporter", "file")
+    monkeypatch.setattr(tracing.settings, "tracing_file", str(path))
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(tracing._exporter()))
+
+    with provider.get_tracer("test").start_as_current_span("outer"):
+        with provider.get_tracer("test").start_as_current_span("inner"):
+            pass
+    provider.shutdown()
+    trace_file = tracing._trace_file
+    tracing.shutdown_tracing()
+
+    assert trace_file.closed
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["inner", "outer"]
@@ -6,6 +6,13 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str
+    # Connection pool (ignored for SQLite). Keep replicas x (pool size +
+    # overflow) below Postgres max_connections
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced (-1 = never)
+    db_pool_timeout: float = 30.0  # Max wait for a free connection
+    db_pool_pre_ping: bool = True  # Test each connection on checkout
     
     # Service
     service_name: str = "inventory-service"
@@ -16,6 +23,18 @@ class Settings(BaseSettings):
     consul_host: str = "localhost"
     consul_port: int = 8500
     
+    # Cache-Control max-age (seconds) on single product reads
+    read_cache_max_age: int = 0
+    
+    # Bulk upsert (rows written per transaction)
+    bulk_upsert_chunk_size: int = 1000
+    
+    # Tracing (OpenTelemetry): "none", "file" (JSON lines) or "otlp" (HTTP)
+    tracing_exporter: str = "none"
+    tracing_file: str = "traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_max_statement_length: int = 1000  # SQL text kept on DB spans
+    
     # Application
     environment: str = "development"
     
@@ -1,35 +1,315 @@
-from sqlmodel import Session, select
-from .models import Product, ProductCreate, ProductUpdate
+from typing import Dict, List, Optional
+from sqlalchemy import or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .models import (
+    Product,
+    ProductBulkUpsertResult,
+    ProductCreate,
+    ProductRead,
+    ProductRevalidateResponse,
+    ProductUpdate,
+    ProductUpsert,
+    StockReservationItem,
+    price_tag,
+)
 
+# Dialects supporting INSERT ... ON CONFLICT DO UPDATE
+_DIALECT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+# Columns a bulk upsert writes
+_UPSERT_COLUMNS = ("name", "price", "quantity")
 
-def get_product(session: Session, product_id: int):
-    return session.get(Product, product_id)
 
+class ProductNotFoundError(Exception):
+    """Raised when a stock operation references unknown products"""
 
-def get_products(session: Session, skip: int = 0, limit: int = 100):
-    return session.exec(select(Product).offset(skip).limit(limit)).all()
 
+class InsufficientStockError(Exception):
+    """Raised when a stock operation would drive a quantity below zero"""
 
-def create_product(session: Session, product: ProductCreate):
+
+async def get_product(session: AsyncSession, product_id: int):
+    return await session.get(Product, product_id)
+
+
+async def get_product_version(session: AsyncSession, product_id: int) -> Optional[int]:
+    """Only the version of a product (enough to answer a conditional GET)"""
+    results = await session.exec(
+        select(Product.version).where(Product.id == product_id)
+    )
+    return results.first()
+
+
+async def get_products(
+    session: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+):
+    """Products ordered by id; `after_id` gives keyset pagination, else `skip`"""
+    statement = select(Product).order_by(Product.id)
+    if after_id is not None:
+        statement = statement.where(Product.id > after_id)
+    else:
+        statement = statement.offset(skip)
+    results = await session.exec(statement.limit(limit))
+    return results.all()
+
+
+async def get_products_by_ids(session: AsyncSession, product_ids: List[int]):
+    """Fetch several products in a single IN (...) query"""
+    if not product_ids:
+        return []
+    statement = select(Product).where(Product.id.in_(set(product_ids)))
+    results = await session.exec(statement)
+    return results.all()
+
+
+async def revalidate_products(
+    session: AsyncSession, known: Dict[int, Optional[str]]
+) -> ProductRevalidateResponse:
+    """
+    Compare the caller's price tags with the current products (one IN query)
+    and return only the products whose pricing it does not hold yet
+    """
+    result = ProductRevalidateResponse()
+    products = {
+        product.id: product
+        for product in await get_products_by_ids(session, list(known))
+    }
+    for product_id, tag in known.items():
+        product = products.get(product_id)
+        if product is None:
+            result.missing.append(product_id)
+        elif tag is not None and tag == price_tag(product.price):
+            result.unchanged.append(product_id)
+        else:
+            result.changed.append(ProductRead.model_validate(product))
+    return result
+
+
+async def create_product(session: AsyncSession, product: ProductCreate):
     db_product = Product.model_validate(product)
     session.add(db_product)
-    session.commit()
-    session.refresh(db_product)
+    await session.commit()
+    await session.refresh(db_product)
     return db_product
 
 
-def update_stock(session: Session, product_id: int, quantity_delta: int):
-    product = get_product(session, product_id)
+async def update_stock(session: AsyncSession, product_id: int, quantity_delta: int):
+    """
+    Apply a stock delta in a single conditional UPDATE ... RETURNING.
+    The database checks and changes the quantity atomically, so concurrent
+    adjustments cannot lose updates or drive the stock below zero.
+    """
+    statement = (
+        update(Product)
+        .where(Product.id == product_id, Product.quantity + quantity_delta >= 0)
+        .values(quantity=Product.quantity + quantity_delta, version=Product.version + 1)
+        .returning(Product)
+    )
+    result = await session.exec(statement)
+    product = result.scalars().one_or_none()
+    if product is not None:
+        await session.commit()
+        return product
+
+    # No row matched: either the product is unknown or the stock is too low
+    await session.rollback()
+    product = await get_product(session, product_id)
     if not product:
         return None
-    product.quantity += quantity_delta
-    session.add(product)
-    session.commit()
-    session.refresh(product)
-    return product
-
-def update_product(session: Session, product_id: int, product_data: ProductUpdate):
-    db_product = session.get(Product, product_id)
+    raise InsufficientStockError(
+        f"Insufficient stock for product {product_id}: "
+        f"requested {-quantity_delta}, available {product.quantity}"
+    )
+
+
+async def reserve_stock(session: AsyncSession, items: List[StockReservationItem]):
+    """
+    Decrease stock for several products in one transaction.
+    Rows are locked in id order so concurrent reservations cannot deadlock,
+    and either every line is applied or none is.
+    """
+    # Aggregate repeated product ids into a single quantity per product
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    if not quantities:
+        return []
+
+    statement = (
+        select(Product)
+        .where(Product.id.in_(quantities))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    results = await session.exec(statement)
+    products = {product.id: product for product in results.all()}
+
+    missing = [product_id for product_id in sorted(quantities) if product_id not in products]
+    if missing:
+        await session.rollback()
+        raise ProductNotFoundError(f"Products not found: {missing}")
+
+    for product_id in sorted(quantities):
+        product = products[product_id]
+        if product.quantity < quantities[product_id]:
+            # Build the message first: rollback expires the loaded rows
+            message = (
+                f"Insufficient stock for product {product_id}: "
+                f"requested {quantities[product_id]}, available {product.quantity}"
+            )
+            await session.rollback()
+            raise InsufficientStockError(message)
+        product.quantity -= quantities[product_id]
+        product.version = Product.version + 1
+        session.add(product)
+
+    return await _commit_and_reload(session, sorted(quantities))
+
+
+async def release_stock(session: AsyncSession, items: List[StockReservationItem]):
+    """
+    Give back stock taken by an earlier reservation (compensation).
+    Like `reserve_stock`, rows are locked in id order and either every line
+    is applied or none is.
+    """
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    if not quantities:
+        return []
+
+    statement = (
+        select(Product)
+        .where(Product.id.in_(quantities))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    results = await session.exec(statement)
+    products = {product.id: product for product in results.all()}
+
+    missing = [product_id for product_id in sorted(quantities) if product_id not in products]
+    if missing:
+        await session.rollback()
+        raise ProductNotFoundError(f"Products not found: {missing}")
+
+    for product_id in sorted(quantities):
+        product = products[product_id]
+        product.quantity += quantities[product_id]
+        product.version = Product.version + 1
+        session.add(product)
+
+    return await _commit_and_reload(session, sorted(quantities))
+
+
+async def _commit_and_reload(session: AsyncSession, product_ids: List[int]):
+    # Versions are bumped in SQL (version = version + 1), which leaves them
+    # expired on the objects; reload the written rows in one query, still
+    # under their locks, so they can be serialized
+    await session.flush()
+    statement = (
+        select(Product)
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id)
+        .execution_options(populate_existing=True)
+    )
+    products = (await session.exec(statement)).all()
+    await session.commit()
+    return products
+
+
+async def upsert_products(
+    session: AsyncSession, products: List[ProductUpsert], chunk_size: int = 1000
+) -> ProductBulkUpsertResult:
+    """
+    Insert or update many products, committing every `chunk_size` rows.
+    Rows with a sku go through one INSERT ... ON CONFLICT (sku) DO UPDATE per
+    chunk, which only touches rows whose values actually differ. Rows keyed
+    by id update existing products; unknown ids are reported as missing.
+    A key repeated within a chunk counts once (its last row wins).
+    """
+    result = ProductBulkUpsertResult()
+    for start in range(0, len(products), chunk_size):
+        chunk = products[start:start + chunk_size]
+        by_sku = [product for product in chunk if product.sku is not None]
+        by_id = [product for product in chunk if product.sku is None]
+        await _upsert_by_sku(session, by_sku, result)
+        await _update_by_id(session, by_id, result)
+        await session.commit()
+    return result
+
+
+async def _upsert_by_sku(
+    session: AsyncSession,
+    products: List[ProductUpsert],
+    result: ProductBulkUpsertResult,
+):
+    by_sku = {product.sku: product for product in products}
+    if not by_sku:
+        return
+    results = await session.exec(select(Product.sku).where(Product.sku.in_(by_sku)))
+    existing = set(results.all())
+
+    insert = _DIALECT_INSERTS[session.bind.dialect.name]
+    statement = insert(Product).values(
+        [
+            product.model_dump(include={"sku", *_UPSERT_COLUMNS})
+            for product in by_sku.values()
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={
+            **{column: statement.excluded[column] for column in _UPSERT_COLUMNS},
+            "version": Product.version + 1,
+        },
+        where=or_(
+            *(
+                getattr(Product, column).is_distinct_from(statement.excluded[column])
+                for column in _UPSERT_COLUMNS
+            )
+        ),
+    ).returning(Product.sku)
+    # Unchanged conflicting rows are skipped by the WHERE and not returned
+    written = set((await session.exec(statement)).scalars().all())
+
+    result.inserted += len(written - existing)
+    result.updated += len(written & existing)
+    result.unchanged += len(existing - written)
+
+
+async def _update_by_id(
+    session: AsyncSession,
+    products: List[ProductUpsert],
+    result: ProductBulkUpsertResult,
+):
+    by_id = {product.id: product for product in products}
+    if not by_id:
+        return
+    results = await session.exec(select(Product).where(Product.id.in_(by_id)))
+    found = {product.id: product for product in results.all()}
+    result.missing.extend(sorted(set(by_id) - set(found)))
+
+    for product_id, product in found.items():
+        values = by_id[product_id].model_dump(include=set(_UPSERT_COLUMNS))
+        if all(getattr(product, key) == value for key, value in values.items()):
+            result.unchanged += 1
+            continue
+        for key, value in values.items():
+            setattr(product, key, value)
+        product.version = Product.version + 1
+        session.add(product)
+        result.updated += 1
+
+
+async def update_product(
+    session: AsyncSession, product_id: int, product_data: ProductUpdate
+):
+    db_product = await session.get(Product, product_id)
     if not db_product:
         return None
 
@@ -37,8 +317,10 @@ def update_product(session: Session, product_id: int, product_data: ProductUpdat
     hero_data = product_data.model_dump(exclude_unset=True)
     for key, value in hero_data.items():
         setattr(db_product, key, value)
+    # Bumped in SQL, so concurrent writes cannot both store the same version
+    db_product.version = Product.version + 1
 
     session.add(db_product)
-    session.commit()
-    session.refresh(db_product)
+    await session.commit()
+    await session.refresh(db_product)
     return db_product
\ No newline at end of file
@@ -1,20 +1,101 @@
-from sqlmodel import create_engine, Session, SQLModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .config import settings
+from .db_metrics import pool_metrics
+from .metrics import instrument_engine
+from .tracing import trace_engine
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
+
+def async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver (asyncpg / aiosqlite)"""
+    for prefix, driver in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+def pool_options(url: str) -> dict:
+    """Connection pool options from settings (SQLite keeps its default pool)"""
+    # Pre-ping tests each connection on checkout (one extra round trip);
+    # with it disabled, db_pool_recycle alone retires stale connections
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_timeout=settings.db_pool_timeout,
+            # Times each checkout into pool_metrics (/metrics/db)
+            poolclass=pool_metrics.pool_class(),
+        )
+    return options
+
+
+# Create async database engine
+engine = create_async_engine(
+    async_database_url(settings.database_url),
     echo=True if settings.environment == "development" else False,  # Log SQL queries in dev
-    pool_pre_ping=True,  # Verify connections before using them
+    **pool_options(settings.database_url),
 )
+instrument_engine(engine)
+pool_metrics.instrument(engine)
+trace_engine(engine)
+
+
+# create_all only creates missing tables. Columns, indexes and constraints
+# added to existing tables since they were first created are applied here,
+# so older Postgres databases are upgraded in place (every statement is
+# idempotent).
+SCHEMA_UPGRADES = [
+    # ETag version, bumped by every write
+    "ALTER TABLE product ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    # Catalog sku, the conflict target of bulk upserts (ON CONFLICT (sku))
+    "ALTER TABLE product ADD COLUMN IF NOT EXISTS sku VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_product_sku ON product (sku)",
+    # Stock can never go negative. Rows that already break the rule are
+    # left alone (NOT VALID) rather than failing startup; new writes are
+    # still checked
+    """
+    DO $$
+    BEGIN
+        ALTER TABLE product ADD CONSTRAINT ck_product_quantity_non_negative
+            CHECK (quantity >= 0);
+    EXCEPTION
+        WHEN duplicate_object THEN NULL;
+        WHEN check_violation THEN
+            ALTER TABLE product ADD CONSTRAINT ck_product_quantity_non_negative
+                CHECK (quantity >= 0) NOT VALID;
+            RAISE WARNING 'Negative stock found: the quantity check is NOT VALID';
+    END
+    $$
+    """,
+]
+
+
+async def create_db_and_tables():
+    """Create all tables in the database and upgrade existing ones"""
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
 
 
-def create_db_and_tables():
-    """Create all tables in the database"""
-    SQLModel.metadata.create_all(engine)
+async def get_session():
+    """Dependency function to get an async database session"""
+    # expire_on_commit=False keeps committed objects readable without
+    # issuing implicit (blocking) refresh queries
+    # The connection is checked out lazily, on the session's first statement
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
 
 
-def get_session():
-    """Dependency function to get database session"""
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+def db_metrics():
+    """Pool occupancy and checkout timings for the /metrics/db endpoint"""
+    return pool_metrics.snapshot(engine.pool)
@@ -1,22 +1,43 @@
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .database import create_db_and_tables
+from .database import create_db_and_tables, db_metrics
+from .metrics import PrometheusMiddleware, metrics_response
+from .tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from .routers import products
 from .consul_client import consul_client
 from .config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    setup_tracing()
+    await create_db_and_tables()
     consul_client.register_service()
     yield
     consul_client.deregister_service()
+    shutdown_tracing()
 
 
 app = FastAPI(title="Inventory Service", lifespan=lifespan)
+
+# Per-route latency, status and in-flight metrics (served at /metrics)
+app.add_middleware(PrometheusMiddleware)
+# Server span per request, continuing the caller's trace (W3C traceparent)
+app.add_middleware(TracingMiddleware)
 app.include_router(products.router, prefix="/api")
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
+
+@app.get("/metrics/db")
+def database_metrics():
+    """Connection pool occupancy, checkout latency and wait time"""
+    return db_metrics()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
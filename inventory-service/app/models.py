@@ -1,15 +1,32 @@
-from typing import Optional
+import hashlib
+from typing import Dict, List, Optional
+from sqlalchemy import CheckConstraint
+from pydantic import computed_field, model_validator
 from sqlmodel import SQLModel, Field
 
 
+def price_tag(price: float) -> str:
+    """Validator of a product's pricing; unlike the ETag, stock changes keep it"""
+    return hashlib.sha256(repr(float(price)).encode()).hexdigest()[:16]
+
+
 class ProductBase(SQLModel):
     name: str
     price: float = Field(gt=0)
     quantity: int = Field(ge=0)
+    # External catalog identifier, used as the key for bulk upserts
+    sku: Optional[str] = Field(default=None, max_length=64, unique=True, index=True)
 
 
 class Product(ProductBase, table=True):
+    # Field(ge=0) is not validated on table models, so the database enforces it
+    __table_args__ = (
+        CheckConstraint("quantity >= 0", name="ck_product_quantity_non_negative"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Bumped by every write; the ETag of GET /products/{id} is built from it
+    version: int = Field(default=1)
 
 
 class ProductCreate(ProductBase):
@@ -19,8 +36,60 @@ class ProductCreate(ProductBase):
 class ProductRead(ProductBase):
     id: int
 
+    @computed_field
+    @property
+    def price_tag(self) -> str:
+        return price_tag(self.price)
+
 
 class ProductUpdate(SQLModel):
     name: Optional[str] = None
     price: Optional[float] = None
-    quantity: Optional[int] = None
+    quantity: Optional[int] = Field(default=None, ge=0)
+    sku: Optional[str] = Field(default=None, max_length=64)
+
+
+class ProductBatchRequest(SQLModel):
+    ids: List[int]
+
+
+class ProductRevalidateRequest(SQLModel):
+    # Product id -> price_tag the caller holds (null for a product it lacks)
+    known: Dict[int, Optional[str]]
+
+
+class ProductRevalidateResponse(SQLModel):
+    changed: List[ProductRead] = []  # New to the caller, or repriced
+    unchanged: List[int] = []
+    missing: List[int] = []
+
+
+class StockReservationItem(SQLModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+
+
+class StockReservation(SQLModel):
+    items: List[StockReservationItem]
+
+
+class ProductUpsert(ProductBase):
+    """
+    One row of a bulk upsert, keyed by `sku` when given (inserted if new),
+    otherwise by `id` (which must already exist)
+    """
+
+    id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_key(self):
+        if self.sku is None and self.id is None:
+            raise ValueError("Either sku or id is required")
+        return self
+
+
+class ProductBulkUpsertResult(SQLModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    missing: List[int] = []  # Ids (of rows without sku) that do not exist
@@ -0,0 +1,28 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Dict, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the keyset of the last row of a page into an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **fields: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    Each keyword names a field and the callable used to parse it, e.g.
+    `decode_cursor(cursor, id=int)`; values are returned in keyword order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return tuple(parse(values[field]) for field, parse in fields.items())
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
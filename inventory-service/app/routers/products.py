@@ -1,39 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
+from ..config import settings
 from ..database import get_session
 from .. import crud, models
+from ..pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+def product_etag(product_id: int, version: int) -> str:
+    """Strong ETag of a product; it changes whenever a write bumps the version"""
+    return f'"{product_id}.{version}"'
+
+
+def cache_headers(etag: str) -> dict:
+    # Clients may reuse a response for max-age seconds, then must revalidate
+    return {
+        "ETag": etag,
+        "Cache-Control": f"max-age={settings.read_cache_max_age}, must-revalidate",
+    }
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Check an If-None-Match header (a list of tags, or *) against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+
 @router.post("/", response_model=models.ProductRead)
-def create_product(
-    product: models.ProductCreate, session: Session = Depends(get_session)
+async def create_product(
+    product: models.ProductCreate, session: AsyncSession = Depends(get_session)
 ):
-    return crud.create_product(session, product)
+    return await crud.create_product(session, product)
 
 
 @router.get("/", response_model=List[models.ProductRead])
-def read_products(
-    skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def read_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    List products. When a page is full, its X-Next-Cursor header can be
+    passed back as `cursor` to fetch the next one (`skip` still works).
+    """
+    after_id = None
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, id=int)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    products = await crud.get_products(session, skip, limit, after_id=after_id)
+    if products and len(products) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": products[-1].id})
+    return products
+
+
+@router.post("/batch", response_model=List[models.ProductRead])
+async def read_products_batch(
+    batch: models.ProductBatchRequest, session: AsyncSession = Depends(get_session)
+):
+    """Fetch several products at once; unknown ids are simply omitted"""
+    return await crud.get_products_by_ids(session, batch.ids)
+
+
+@router.post("/batch/revalidate", response_model=models.ProductRevalidateResponse)
+async def revalidate_products_batch(
+    request: models.ProductRevalidateRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Revalidate cached product prices in bulk: send the price_tag held for
+    each id (null if none) and get back only the products that changed,
+    plus the ids that are unchanged or unknown
+    """
+    return await crud.revalidate_products(session, request.known)
+
+
+@router.post("/stock/reserve", response_model=List[models.ProductRead])
+async def reserve_stock(
+    reservation: models.StockReservation, session: AsyncSession = Depends(get_session)
+):
+    """Atomically decrease stock for several products (all or nothing)"""
+    try:
+        return await crud.reserve_stock(session, reservation.items)
+    except crud.ProductNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except crud.InsufficientStockError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/stock/release", response_model=List[models.ProductRead])
+async def release_stock(
+    reservation: models.StockReservation, session: AsyncSession = Depends(get_session)
+):
+    """Give back stock from an earlier reservation (all or nothing)"""
+    try:
+        return await crud.release_stock(session, reservation.items)
+    except crud.ProductNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.put("/bulk", response_model=models.ProductBulkUpsertResult)
+async def upsert_products(
+    products: List[models.ProductUpsert], session: AsyncSession = Depends(get_session)
 ):
-    return crud.get_products(session, skip, limit)
+    """
+    Catalog sync: insert or update many products by sku (or update by id).
+    Reports how many rows were inserted, updated or already up to date.
+    """
+    return await crud.upsert_products(
+        session, products, chunk_size=settings.bulk_upsert_chunk_size
+    )
 
 
 @router.get("/{product_id}", response_model=models.ProductRead)
-def read_product(product_id: int, session: Session = Depends(get_session)):
-    product = crud.get_product(session, product_id)
+async def read_product(
+    product_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+):
+    # Conditional GET: callers holding the current version get an empty 304,
+    # answered from the version column alone without loading the product
+    if if_none_match:
+        version = await crud.get_product_version(session, product_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        etag = product_etag(product_id, version)
+        if etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers=cache_headers(etag))
+
+    product = await crud.get_product(session, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    response.headers.update(cache_headers(product_etag(product.id, product.version)))
     return product
 
 
 @router.patch("/{product_id}/stock", response_model=models.ProductRead)
-def adjust_stock(
-    product_id: int, quantity_delta: int, session: Session = Depends(get_session)
+async def adjust_stock(
+    product_id: int, quantity_delta: int, session: AsyncSession = Depends(get_session)
 ):
-    product = crud.update_stock(session, product_id, quantity_delta)
+    try:
+        product = await crud.update_stock(session, product_id, quantity_delta)
+    except crud.InsufficientStockError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
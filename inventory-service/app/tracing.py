@@ -0,0 +1,142 @@
+import os
+from typing import Optional, TextIO
+from opentelemetry import propagate, trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+)
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+from .metrics import route_template
+
+# Spans are no-ops until `setup_tracing` installs a provider
+tracer = trace.get_tracer(settings.service_name)
+
+_provider: Optional[TracerProvider] = None
+# Written by the "file" exporter, closed by `shutdown_tracing`
+_trace_file: Optional[TextIO] = None
+
+
+def setup_tracing() -> Optional[TracerProvider]:
+    """
+    Install the span exporter selected by `settings.tracing_exporter`:
+    "file" appends one JSON span per line to `settings.tracing_file`,
+    "otlp" sends them to an OTLP/HTTP collector, "none" keeps tracing off.
+    """
+    global _provider
+    if settings.tracing_exporter == "none" or _provider is not None:
+        return _provider
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.service_name})
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(_provider)
+    print(f"🔭 Tracing enabled ({settings.tracing_exporter} exporter)")
+    return _provider
+
+
+def shutdown_tracing():
+    """Flush spans still buffered by the batch processor, then close the file"""
+    global _provider, _trace_file
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+def _exporter() -> SpanExporter:
+    global _trace_file
+    if settings.tracing_exporter == "otlp":
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    if settings.tracing_exporter == "file":
+        _trace_file = open(settings.tracing_file, "a", buffering=1)
+        return ConsoleSpanExporter(
+            out=_trace_file,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+
+class TracingMiddleware:
+    """
+    Plain ASGI middleware opening a server span per request, named after the
+    route template. A W3C `traceparent` header from the caller is honoured,
+    so downstream spans join the caller's trace.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        method = scope["method"]
+        route = route_template(scope)
+
+        with tracer.start_as_current_span(
+            f"{method} {route}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "http.route": route},
+        ) as span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+
+def trace_engine(engine: AsyncEngine):
+    """Open a client span around every statement the engine executes"""
+    sync_engine = engine.sync_engine
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        span = tracer.start_span(
+            f"db {operation}".rstrip(),
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": system,
+                "db.operation.name": operation,
+                "db.query.text": statement[: settings.tracing_max_statement_length],
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        conn.info["trace_spans"].pop().end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is None:
+            return
+        spans = context.connection.info.get("trace_spans")
+        if spans:
+            span = spans.pop()
+            span.record_exception(context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
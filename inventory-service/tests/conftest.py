@@ -1,5 +1,7 @@
 import pytest
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import database
 from app import main as app_main
@@ -7,25 +9,27 @@ from app.main import app
 
 
 @pytest.fixture
-def engine():
-    """Create a pure in-memory SQLite engine for tests using StaticPool."""
+async def engine():
+    """Create a pure in-memory async SQLite engine for tests using StaticPool."""
     from sqlalchemy.pool import StaticPool
 
-    url = "sqlite:///:memory:"
-    engine = create_engine(
+    url = "sqlite+aiosqlite:///:memory:"
+    engine = create_async_engine(
         url,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
         pool_pre_ping=True,
     )
-    SQLModel.metadata.create_all(engine)
-    return engine
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
 
 
 @pytest.fixture
-def session(engine):
+async def session(engine):
     """Create a fresh session for a test."""
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -34,8 +38,8 @@ def client(monkeypatch, engine):
     """TestClient that overrides DB dependency and suppresses Consul registration."""
 
     # Override get_session dependency to use test engine
-    def get_session_override():
-        with Session(engine) as s:
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as s:
             yield s
 
     # Override the module-level engine
@@ -57,7 +61,10 @@ def client(monkeypatch, engine):
         pass
 
     # Prevent real startup (DB creation on prod DB, Consul registration)
-    monkeypatch.setattr(app_main, "create_db_and_tables", lambda: None)
+    async def create_db_and_tables_noop():
+        pass
+
+    monkeypatch.setattr(app_main, "create_db_and_tables", create_db_and_tables_noop)
 
     # Suppress consul register/deregister
     try:
@@ -66,9 +73,6 @@ def client(monkeypatch, engine):
     except Exception:
         pass
 
-    # Ensure metadata is created on the test engine
-    SQLModel.metadata.create_all(engine)
-
     from fastapi.testclient import TestClient
 
     with TestClient(app) as c:
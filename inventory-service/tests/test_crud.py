@@ -3,50 +3,287 @@ from app import crud
 from app.models import ProductCreate, ProductUpdate
 
 
-def test_create_and_get_product(session):
+async def test_create_and_get_product(session):
     payload = ProductCreate(name="Laptop", price=999.99, quantity=10)
-    created = crud.create_product(session, payload)
+    created = await crud.create_product(session, payload)
 
     assert created.id is not None
     assert created.name == "Laptop"
     assert created.price == 999.99
 
-    fetched = crud.get_product(session, created.id)
+    fetched = await crud.get_product(session, created.id)
     assert fetched.id == created.id
 
 
-def test_get_products_pagination(session):
+async def test_get_products_pagination(session):
     # Create 5 products
     for i in range(5):
-        crud.create_product(
+        await crud.create_product(
             session, ProductCreate(name=f"Prod{i}", price=10.0 + i, quantity=5)
         )
 
-    results = crud.get_products(session, skip=0, limit=2)
+    results = await crud.get_products(session, skip=0, limit=2)
     assert len(results) == 2
 
 
-def test_update_product(session):
-    created = crud.create_product(
+async def test_update_product(session):
+    created = await crud.create_product(
         session, ProductCreate(name="Phone", price=500.0, quantity=20)
     )
 
     update_data = ProductUpdate(price=450.0)
-    updated = crud.update_product(session, created.id, update_data)
+    updated = await crud.update_product(session, created.id, update_data)
 
     assert updated.price == 450.0
     assert updated.name == "Phone"  # Unchanged
 
 
-def test_update_stock_logic(session):
-    created = crud.create_product(
+async def test_update_stock_logic(session):
+    created = await crud.create_product(
         session, ProductCreate(name="Mouse", price=25.0, quantity=100)
     )
 
     # Add stock
-    updated = crud.update_stock(session, created.id, 10)
+    updated = await crud.update_stock(session, created.id, 10)
     assert updated.quantity == 110
 
     # Remove stock
-    updated = crud.update_stock(session, created.id, -20)
+    updated = await crud.update_stock(session, created.id, -20)
     assert updated.quantity == 90
+
+
+async def test_get_products_by_ids(session):
+    created = [
+        await crud.create_product(
+            session, ProductCreate(name=f"Batch{i}", price=5.0, quantity=1)
+        )
+        for i in range(3)
+    ]
+    wanted = [created[0].id, created[2].id, created[0].id, 9999]
+
+    results = await crud.get_products_by_ids(session, wanted)
+
+    assert sorted(p.id for p in results) == [created[0].id, created[2].id]
+    assert await crud.get_products_by_ids(session, []) == []
+
+
+async def test_reserve_stock_applies_all_lines(session):
+    from app.models import StockReservationItem
+
+    a = await crud.create_product(
+        session, ProductCreate(name="A", price=1.0, quantity=10)
+    )
+    b = await crud.create_product(
+        session, ProductCreate(name="B", price=1.0, quantity=5)
+    )
+
+    reserved = await crud.reserve_stock(
+        session,
+        [
+            StockReservationItem(product_id=b.id, quantity=2),
+            StockReservationItem(product_id=a.id, quantity=3),
+            StockReservationItem(product_id=a.id, quantity=1),
+        ],
+    )
+
+    assert [(p.id, p.quantity) for p in reserved] == [(a.id, 6), (b.id, 3)]
+
+
+async def test_reserve_stock_is_all_or_nothing(session):
+    from app.models import StockReservationItem
+
+    a = await crud.create_product(
+        session, ProductCreate(name="A", price=1.0, quantity=10)
+    )
+    b = await crud.create_product(
+        session, ProductCreate(name="B", price=1.0, quantity=1)
+    )
+    # Rollback expires loaded rows, so keep plain ids around
+    a_id, b_id = a.id, b.id
+
+    with pytest.raises(crud.InsufficientStockError):
+        await crud.reserve_stock(
+            session,
+            [
+                StockReservationItem(product_id=a_id, quantity=4),
+                StockReservationItem(product_id=b_id, quantity=2),
+            ],
+        )
+
+    with pytest.raises(crud.ProductNotFoundError):
+        await crud.reserve_stock(
+            session,
+            [
+                StockReservationItem(product_id=a_id, quantity=4),
+                StockReservationItem(product_id=9999, quantity=1),
+            ],
+        )
+
+    assert (await crud.get_product(session, a_id)).quantity == 10
+    assert (await crud.get_product(session, b_id)).quantity == 1
+
+
+async def test_get_products_keyset(session):
+    created = [
+        await crud.create_product(
+            session, ProductCreate(name=f"K{i}", price=1.0, quantity=1)
+        )
+        for i in range(4)
+    ]
+
+    page = await crud.get_products(session, limit=10, after_id=created[1].id)
+    assert [p.id for p in page] == [created[2].id, created[3].id]
+
+
+async def test_update_stock_refuses_to_go_negative(session):
+    created = await crud.create_product(
+        session, ProductCreate(name="Cable", price=3.0, quantity=2)
+    )
+
+    with pytest.raises(crud.InsufficientStockError):
+        await crud.update_stock(session, created.id, -3)
+
+    assert (await crud.get_product(session, created.id)).quantity == 2
+    assert await crud.update_stock(session, 9999, -1) is None
+
+
+def test_update_stock_concurrent_decrements(tmp_path):
+    """Many threads draining one product never lose an update or oversell"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'stock.db'}"
+    threads, decrements, stock = 8, 10, 50
+
+    async def setup():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            product = await crud.create_product(
+                session, ProductCreate(name="Hot", price=1.0, quantity=stock)
+            )
+            product_id = product.id
+        await engine.dispose()
+        return product_id
+
+    async def drain(product_id):
+        # One engine per thread/event loop; the file lock serialises writers
+        engine = create_async_engine(url, connect_args={"timeout": 30})
+        sold = 0
+        try:
+            for _ in range(decrements):
+                async with AsyncSession(engine) as session:
+                    try:
+                        await crud.update_stock(session, product_id, -1)
+                        sold += 1
+                    except crud.InsufficientStockError:
+                        pass
+        finally:
+            await engine.dispose()
+        return sold
+
+    product_id = asyncio.run(setup())
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        sold = list(
+            pool.map(lambda _: asyncio.run(drain(product_id)), range(threads))
+        )
+
+    async def remaining():
+        engine = create_async_engine(url)
+        async with AsyncSession(engine) as session:
+            quantity = (await crud.get_product(session, product_id)).quantity
+        await engine.dispose()
+        return quantity
+
+    assert sum(sold) == stock
+    assert asyncio.run(remaining()) == 0
+
+
+async def test_upsert_products_counts_changes(session):
+    from app.models import ProductUpsert
+
+    existing = await crud.create_product(
+        session, ProductCreate(name="Kept", price=4.0, quantity=1)
+    )
+    first = await crud.upsert_products(
+        session,
+        [
+            ProductUpsert(sku="S-1", name="One", price=1.0, quantity=1),
+            ProductUpsert(sku="S-2", name="Two", price=2.0, quantity=2),
+        ],
+    )
+    assert (first.inserted, first.updated, first.unchanged) == (2, 0, 0)
+
+    second = await crud.upsert_products(
+        session,
+        [
+            ProductUpsert(sku="S-1", name="One", price=1.0, quantity=1),
+            ProductUpsert(sku="S-2", name="Two", price=2.5, quantity=2),
+            ProductUpsert(sku="S-3", name="Three", price=3.0, quantity=3),
+            ProductUpsert(id=existing.id, name="Kept", price=4.0, quantity=1),
+            ProductUpsert(id=9999, name="Ghost", price=1.0, quantity=1),
+        ],
+        chunk_size=2,
+    )
+
+    assert (second.inserted, second.updated, second.unchanged) == (1, 1, 2)
+    assert second.missing == [9999]
+    products = {p.sku: p for p in await crud.get_products(session)}
+    assert products["S-2"].price == 2.5
+    assert products["S-3"].quantity == 3
+
+
+async def test_upsert_products_requires_a_key():
+    from pydantic import ValidationError
+    from app.models import ProductUpsert
+
+    with pytest.raises(ValidationError):
+        ProductUpsert(name="Keyless", price=1.0, quantity=1)
+
+
+async def test_every_write_bumps_the_version(session):
+    from app.models import ProductUpsert, StockReservationItem
+
+    created = await crud.create_product(
+        session, ProductCreate(name="V", price=1.0, quantity=10, sku="V-1")
+    )
+    assert created.version == 1
+
+    await crud.update_stock(session, created.id, -1)
+    await crud.reserve_stock(
+        session, [StockReservationItem(product_id=created.id, quantity=1)]
+    )
+    await crud.release_stock(
+        session, [StockReservationItem(product_id=created.id, quantity=1)]
+    )
+    await crud.update_product(session, created.id, ProductUpdate(price=2.0))
+    await crud.upsert_products(
+        session, [ProductUpsert(sku="V-1", name="V", price=3.0, quantity=9)]
+    )
+    # An upsert that changes nothing leaves the version alone
+    await crud.upsert_products(
+        session, [ProductUpsert(sku="V-1", name="V", price=3.0, quantity=9)]
+    )
+
+    assert await crud.get_product_version(session, created.id) == 6
+    assert await crud.get_product_version(session, 9999) is None
+
+
+async def test_concurrent_writes_each_bump_the_version(engine, session):
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    created = await crud.create_product(
+        session, ProductCreate(name="Race", price=1.0, quantity=10)
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as other:
+        # Both writers loaded version 1 before either of them wrote
+        await crud.get_product(other, created.id)
+        await crud.update_product(session, created.id, ProductUpdate(price=2.0))
+        updated = await crud.update_product(other, created.id, ProductUpdate(price=3.0))
+
+    assert updated.version == 3
+    assert await crud.get_product_version(session, created.id) == 3
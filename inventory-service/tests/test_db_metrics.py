@@ -0,0 +1,77 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import pool_options
+from app.db_metrics import PoolMetrics
+
+
+def test_pool_options_apply_to_server_databases_only():
+    assert set(pool_options("sqlite:///:memory:")) == {"pool_pre_ping"}
+    assert set(pool_options("postgresql://u:p@db/app")) == {
+        "pool_pre_ping",
+        "pool_size",
+        "max_overflow",
+        "pool_recycle",
+        "pool_timeout",
+        "poolclass",
+    }
+
+
+async def test_pool_metrics_record_checkouts_waits_and_connects(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metrics.pool_class(),
+        pool_size=1,
+        max_overflow=0,
+    )
+    metrics.instrument(engine)
+    try:
+        # The first checkout has to open the connection, the second reuses it
+        for _ in range(2):
+            async with AsyncSession(engine) as session:
+                await session.exec(text("SELECT 1"))
+                assert metrics.snapshot(engine.pool)["checked_out"] == 1
+
+        snapshot = metrics.snapshot(engine.pool)
+        assert snapshot["pool"] == "TimedAsyncAdaptedQueuePool"
+        assert snapshot["size"] == 1
+        assert snapshot["checked_out"] == 0
+        assert snapshot["checkouts"] == 2
+        assert snapshot["waits"] == 1
+        assert snapshot["connects"] == 1
+        assert snapshot["checkout_latency_max_ms"] >= snapshot["wait_time_avg_ms"] > 0
+    finally:
+        await engine.dispose()
+
+
+async def test_sessions_check_out_connections_lazily(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metrics.pool_class(),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    try:
+        # An idle session does not hold the only connection
+        async with AsyncSession(engine) as idle:
+            async with AsyncSession(engine) as busy:
+                await busy.exec(text("SELECT 1"))
+            assert idle.in_transaction() is False
+
+        assert metrics.checkouts == 1
+        assert metrics.timeouts == 0
+    finally:
+        await engine.dispose()
+
+
+def test_db_metrics_endpoint(client):
+    resp = client.get("/metrics/db")
+
+    assert resp.status_code == 200
+    assert {"checked_out", "checkouts", "waits", "timeouts", "connects"} <= set(
+        resp.json()
+    )
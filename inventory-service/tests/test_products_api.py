@@ -1,11 +1,11 @@
 from app import crud
-from app.models import ProductCreate
+from app.models import ProductCreate, ProductUpdate
 
 
-def test_list_products_pagination(client, session):
+async def test_list_products_pagination(client, session):
     # Seed data
     for i in range(4):
-        crud.create_product(
+        await crud.create_product(
             session, ProductCreate(name=f"P{i}", price=10.0, quantity=10)
         )
 
@@ -16,8 +16,8 @@ def test_list_products_pagination(client, session):
     assert len(data) == 2
 
 
-def test_get_single_product(client, session):
-    created = crud.create_product(
+async def test_get_single_product(client, session):
+    created = await crud.create_product(
         session, ProductCreate(name="Tablet", price=300.0, quantity=5)
     )
     resp = client.get(f"/products/{created.id}")
@@ -27,7 +27,7 @@ def test_get_single_product(client, session):
     assert body["name"] == "Tablet"
 
 
-def test_create_product_success(client):
+async def test_create_product_success(client):
     payload = {"name": "New Item", "price": 15.50, "quantity": 100}
     resp = client.post("/products/", json=payload)
     assert resp.status_code == 200  # or 201 if you set status_code=201
@@ -36,15 +36,15 @@ def test_create_product_success(client):
     assert "id" in body
 
 
-def test_create_product_validation_error(client):
+async def test_create_product_validation_error(client):
     # Negative price should fail
     payload = {"name": "Bad", "price": -5.0, "quantity": 10}
     resp = client.post("/products/", json=payload)
     assert resp.status_code == 422
 
 
-def test_adjust_stock_endpoint(client, session):
-    created = crud.create_product(
+async def test_adjust_stock_endpoint(client, session):
+    created = await crud.create_product(
         session, ProductCreate(name="StockItem", price=10.0, quantity=50)
     )
 
@@ -57,10 +57,196 @@ def test_adjust_stock_endpoint(client, session):
     assert body["quantity"] == 45
 
     # Force the session to reload the object from the DB
-    session.refresh(created)
+    await session.refresh(created)
 
     assert created.quantity == 45
 
-def test_get_not_found(client):
+async def test_get_not_found(client):
     resp = client.get("/products/99999")
     assert resp.status_code == 404
+
+
+async def test_read_products_batch(client, session):
+    created = [
+        await crud.create_product(session, ProductCreate(name=f"B{i}", price=2.0, quantity=3))
+        for i in range(3)
+    ]
+
+    resp = client.post(
+        "/api/products/batch", json={"ids": [created[1].id, created[2].id, 99999]}
+    )
+
+    assert resp.status_code == 200
+    assert sorted(p["id"] for p in resp.json()) == [created[1].id, created[2].id]
+
+
+async def test_revalidate_returns_only_repriced_products(client, session):
+    same, repriced, unknown_to_caller = [
+        await crud.create_product(
+            session, ProductCreate(name=f"V{i}", price=2.0, quantity=3)
+        )
+        for i in range(3)
+    ]
+    tags = {
+        p["id"]: p["price_tag"]
+        for p in client.post(
+            "/api/products/batch", json={"ids": [same.id, repriced.id]}
+        ).json()
+    }
+    # Stock moves do not change the price tag; a new price does
+    await crud.update_stock(session, same.id, -1)
+    await crud.update_product(session, repriced.id, ProductUpdate(price=2.5))
+
+    resp = client.post(
+        "/api/products/batch/revalidate",
+        json={
+            "known": {
+                same.id: tags[same.id],
+                repriced.id: tags[repriced.id],
+                unknown_to_caller.id: None,
+                99999: "stale",
+            }
+        },
+    )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["unchanged"] == [same.id]
+    assert body["missing"] == [99999]
+    changed = {p["id"]: p for p in body["changed"]}
+    assert set(changed) == {repriced.id, unknown_to_caller.id}
+    assert changed[repriced.id]["price"] == 2.5
+    assert changed[repriced.id]["price_tag"] != tags[repriced.id]
+
+
+async def test_reserve_stock_endpoint(client, session):
+    a = await crud.create_product(session, ProductCreate(name="RA", price=1.0, quantity=4))
+    b = await crud.create_product(session, ProductCreate(name="RB", price=1.0, quantity=4))
+
+    resp = client.post(
+        "/api/products/stock/reserve",
+        json={
+            "items": [
+                {"product_id": a.id, "quantity": 1},
+                {"product_id": b.id, "quantity": 4},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    assert [p["quantity"] for p in resp.json()] == [3, 0]
+
+    # Second reservation cannot be satisfied for b, so a is left untouched too
+    resp = client.post(
+        "/api/products/stock/reserve",
+        json={
+            "items": [
+                {"product_id": a.id, "quantity": 1},
+                {"product_id": b.id, "quantity": 1},
+            ]
+        },
+    )
+    assert resp.status_code == 400
+    assert "Insufficient stock" in resp.json()["detail"]
+
+    await session.refresh(a)
+    assert a.quantity == 3
+
+
+async def test_release_stock_endpoint(client, session):
+    a = await crud.create_product(
+        session, ProductCreate(name="GA", price=1.0, quantity=0)
+    )
+
+    resp = client.post(
+        "/api/products/stock/release",
+        json={"items": [{"product_id": a.id, "quantity": 2}]},
+    )
+    assert resp.status_code == 200
+    assert resp.json()[0]["quantity"] == 2
+
+    resp = client.post(
+        "/api/products/stock/release",
+        json={"items": [{"product_id": 99999, "quantity": 1}]},
+    )
+    assert resp.status_code == 404
+
+    resp = client.post(
+        "/api/products/stock/reserve",
+        json={"items": [{"product_id": 99999, "quantity": 1}]},
+    )
+    assert resp.status_code == 404
+
+
+async def test_read_product_conditional_get(client, session):
+    created = await crud.create_product(
+        session, ProductCreate(name="Cached", price=3.0, quantity=5)
+    )
+    url = f"/api/products/{created.id}"
+
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    assert first.headers["Cache-Control"] == "max-age=0, must-revalidate"
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    # Every write bumps the version and so produces a new ETag
+    await crud.update_stock(session, created.id, -1)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["quantity"] == 4
+
+    await crud.update_product(session, created.id, ProductUpdate(name="Renamed"))
+    renamed = client.get(url, headers={"If-None-Match": changed.headers["ETag"]})
+    assert renamed.status_code == 200
+    missing = client.get("/api/products/99999", headers={"If-None-Match": etag})
+    assert missing.status_code == 404
+
+
+async def test_list_products_cursor_pagination(client, session):
+    created = [
+        await crud.create_product(session, ProductCreate(name=f"C{i}", price=1.0, quantity=1))
+        for i in range(3)
+    ]
+
+    first = client.get("/api/products/?limit=2")
+    second = client.get(f"/api/products/?limit=2&cursor={first.headers['X-Next-Cursor']}")
+
+    ids = [p["id"] for p in first.json() + second.json()]
+    assert ids == [p.id for p in created]
+    assert client.get("/api/products/?cursor=%%%").status_code == 400
+
+
+async def test_adjust_stock_insufficient(client, session):
+    created = await crud.create_product(
+        session, ProductCreate(name="Few", price=1.0, quantity=1)
+    )
+
+    resp = client.patch(f"/api/products/{created.id}/stock?quantity_delta=-2")
+
+    assert resp.status_code == 400
+    assert "Insufficient stock" in resp.json()["detail"]
+
+
+async def test_bulk_upsert_endpoint(client, session):
+    created = await crud.create_product(
+        session, ProductCreate(name="ById", price=1.0, quantity=1)
+    )
+    rows = [
+        {"sku": "CAT-1", "name": "Cat one", "price": 9.5, "quantity": 3},
+        {"id": created.id, "name": "ById renamed", "price": 1.0, "quantity": 1},
+    ]
+
+    resp = client.put("/api/products/bulk", json=rows)
+
+    assert resp.status_code == 200
+    assert resp.json() == {"inserted": 1, "updated": 1, "unchanged": 0, "missing": []}
+    assert client.get(f"/api/products/{created.id}").json()["name"] == "ById renamed"
+
+    resp = client.put("/api/products/bulk", json=rows)
+    assert resp.json()["unchanged"] == 2
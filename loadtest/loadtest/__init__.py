@@ -0,0 +1 @@
+"""Load-test harness for the billing, customer and inventory services"""
@@ -0,0 +1,169 @@
+"""
+Load generator for the billing, customer and inventory services.
+
+Examples (through the Traefik gateway started by docker-compose):
+
+    python -m loadtest --scenario mixed --concurrency 20 --duration 60 \\
+        --seed-customers 1000 --seed-products 1000
+    python -m loadtest --scenario create_bill --bill-items 5 --rate 50 \\
+        --output create_bill.json
+
+The JSON report (stdout unless --output is given) has p50/p95/p99 latency,
+throughput and errors per endpoint and overall.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from typing import Dict, List, Optional
+import httpx
+
+from loadtest.client import LoadClient, Targets
+from loadtest.dataset import load_dataset
+from loadtest.runner import run_closed_loop, run_open_loop
+from loadtest.scenarios import (
+    DEFAULT_MIX,
+    SCENARIOS,
+    Context,
+    ScenarioError,
+    get_scenario,
+)
+from loadtest.stats import Recorder
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "browse_products=5,create_bill=1" into scenario weights"""
+    try:
+        return {
+            name.strip(): float(weight)
+            for name, weight in (part.split("=") for part in value.split(","))
+        }
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid mix: {value}")
+
+
+def positive(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"Must be greater than zero: {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    return int(positive(value))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="loadtest",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "mixed"], default="mixed")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Weights of the mixed scenario, e.g. browse_products=5,create_bill=1",
+    )
+    parser.add_argument(
+        "--bill-items", type=int, default=3, help="Products per created bill"
+    )
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--rate",
+        type=positive,
+        help="Open loop: scenario iterations started per second",
+    )
+    mode.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=10,
+        help="Closed loop: iterations running at once (the default mode)",
+    )
+    parser.add_argument("--duration", type=positive, default=30.0, help="Seconds")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1000,
+        help="Open loop: iterations beyond this many in flight are dropped",
+    )
+
+    parser.add_argument("--base-url", default="http://localhost")
+    parser.add_argument("--customers-url", help="Overrides --base-url")
+    parser.add_argument("--products-url", help="Overrides --base-url")
+    parser.add_argument("--bills-url", help="Overrides --base-url")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per request")
+
+    parser.add_argument("--seed-customers", type=int, default=0)
+    parser.add_argument("--seed-products", type=int, default=0)
+    parser.add_argument("--random-seed", type=int, help="For repeatable runs")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser
+
+
+async def run(args: argparse.Namespace) -> dict:
+    scenario = get_scenario(args.scenario, args.mix)
+    targets = Targets(
+        args.base_url, args.customers_url, args.products_url, args.bills_url
+    )
+    # Enough pooled connections that the client never queues requests
+    in_flight = args.max_in_flight if args.rate else args.concurrency
+    limits = httpx.Limits(
+        max_connections=in_flight, max_keepalive_connections=in_flight
+    )
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as http:
+        dataset = await load_dataset(
+            http, targets, args.seed_customers, args.seed_products
+        )
+        recorder = Recorder()
+        ctx = Context(
+            LoadClient(http, targets, recorder),
+            dataset,
+            random.Random(args.random_seed),
+            bill_items=args.bill_items,
+        )
+        if args.rate:
+            elapsed = await run_open_loop(
+                scenario, ctx, args.rate, args.duration, args.max_in_flight
+            )
+        else:
+            elapsed = await run_closed_loop(
+                scenario, ctx, args.concurrency, args.duration
+            )
+
+    report = {
+        "scenario": args.scenario,
+        "mode": "open" if args.rate else "closed",
+        "rate": args.rate,
+        "concurrency": None if args.rate else args.concurrency,
+        "customers": len(dataset.customer_ids),
+        "products": len(dataset.product_ids),
+    }
+    report.update(recorder.report(elapsed))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        report = asyncio.run(run(args))
+    except (httpx.HTTPError, ScenarioError) as e:
+        print(f"❌ Load test could not start: {e!r}", file=sys.stderr)
+        return 1
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import time
+from typing import Optional
+import httpx
+
+from loadtest.stats import Recorder
+
+
+class Targets:
+    """Base URLs of the three services (all the Traefik gateway by default)"""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost",
+        customers: Optional[str] = None,
+        products: Optional[str] = None,
+        bills: Optional[str] = None,
+    ):
+        self.customers = (customers or base_url).rstrip("/")
+        self.products = (products or base_url).rstrip("/")
+        self.bills = (bills or base_url).rstrip("/")
+
+
+class LoadClient:
+    """
+    Times every request sent through one shared httpx.AsyncClient and
+    records it under its endpoint template.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, targets: Targets, recorder: Recorder):
+        self.http = http
+        self.targets = targets
+        self.recorder = recorder
+
+    async def call(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """
+        Send one request; returns None when it failed without a response
+        (connection error, timeout...), which is recorded as an error too.
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(
+                endpoint, time.perf_counter() - start, error=type(e).__name__
+            )
+            return None
+        self.recorder.record(
+            endpoint, time.perf_counter() - start, status_code=response.status_code
+        )
+        return response
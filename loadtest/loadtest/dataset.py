@@ -0,0 +1,78 @@
+from typing import List
+import httpx
+
+from loadtest.client import Targets
+
+# Seeded rows are recognisable, and seeding again reuses them
+SEED_EMAIL = "loadtest-{}@example.com"
+SEED_SKU = "LOADTEST-{}"
+# Enough stock that bill scenarios do not run out during a run
+SEED_QUANTITY = 1_000_000
+PAGE_SIZE = 500
+
+
+class Dataset:
+    """Ids the scenarios pick from, loaded once before the run starts"""
+
+    def __init__(self, customer_ids: List[int], product_ids: List[int]):
+        self.customer_ids = customer_ids
+        self.product_ids = product_ids
+
+
+async def load_dataset(
+    http: httpx.AsyncClient,
+    targets: Targets,
+    seed_customers: int = 0,
+    seed_products: int = 0,
+    max_ids: int = 10_000,
+) -> Dataset:
+    """
+    Optionally seed customers and products through the bulk endpoints,
+    then collect up to `max_ids` existing ids of each. Setup requests are
+    not part of the measured run.
+    """
+    if seed_customers:
+        response = await http.post(
+            f"{targets.customers}/api/customers/bulk",
+            json=[
+                {"name": f"Load Test {i}", "email": SEED_EMAIL.format(i)}
+                for i in range(seed_customers)
+            ],
+        )
+        response.raise_for_status()
+    if seed_products:
+        response = await http.put(
+            f"{targets.products}/api/products/bulk",
+            json=[
+                {
+                    "sku": SEED_SKU.format(i),
+                    "name": f"Load Test Product {i}",
+                    "price": 1.0 + i % 100,
+                    "quantity": SEED_QUANTITY,
+                }
+                for i in range(seed_products)
+            ],
+        )
+        response.raise_for_status()
+
+    return Dataset(
+        customer_ids=await _list_ids(
+            http, f"{targets.customers}/api/customers", max_ids
+        ),
+        product_ids=await _list_ids(http, f"{targets.products}/api/products/", max_ids),
+    )
+
+
+async def _list_ids(http: httpx.AsyncClient, url: str, max_ids: int) -> List[int]:
+    # Follow the X-Next-Cursor keyset pagination of the list endpoints
+    ids: List[int] = []
+    params = {"limit": PAGE_SIZE}
+    while len(ids) < max_ids:
+        response = await http.get(url, params=params)
+        response.raise_for_status()
+        ids.extend(row["id"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": PAGE_SIZE, "cursor": cursor}
+    return ids[:max_ids]
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Set
+
+from loadtest.scenarios import Context, Scenario
+
+
+async def run_closed_loop(
+    scenario: Scenario, ctx: Context, concurrency: int, duration: float
+) -> float:
+    """
+    `concurrency` workers each run the scenario back to back until
+    `duration` seconds have passed. Throughput adapts to the latency of the
+    services, so this measures capacity. Returns the elapsed time.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + duration
+
+    async def worker():
+        while loop.time() < deadline:
+            await _iterate(scenario, ctx)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return loop.time() - start
+
+
+async def run_open_loop(
+    scenario: Scenario,
+    ctx: Context,
+    rate: float,
+    duration: float,
+    max_in_flight: int = 1000,
+) -> float:
+    """
+    Start the scenario `rate` times per second on a fixed schedule for
+    `duration` seconds, whether or not earlier iterations have finished.
+    Slow responses then show up as latency instead of a lower request rate.
+    Iterations that would exceed `max_in_flight` are dropped and counted.
+    Returns the elapsed time.
+    """
+    loop = asyncio.get_running_loop()
+    recorder = ctx.client.recorder
+    start = loop.time()
+    interval = 1.0 / rate
+    in_flight: Set[asyncio.Task] = set()
+
+    for tick in range(max(1, round(rate * duration))):
+        delay = start + tick * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            recorder.max_schedule_lag = max(recorder.max_schedule_lag, -delay)
+
+        if len(in_flight) >= max_in_flight:
+            recorder.dropped += 1
+        else:
+            task = asyncio.create_task(_iterate(scenario, ctx))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+    await asyncio.gather(*in_flight)
+    return loop.time() - start
+
+
+async def _iterate(scenario: Scenario, ctx: Context):
+    # Request errors are recorded by the client; anything else (a scenario
+    # bug, missing data) fails the iteration without stopping the run
+    recorder = ctx.client.recorder
+    recorder.iterations += 1
+    try:
+        await scenario(ctx)
+    except Exception as e:
+        recorder.failed_iterations[f"{type(e).__name__}: {e}"] += 1
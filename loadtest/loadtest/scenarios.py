@@ -0,0 +1,128 @@
+import random
+from typing import Awaitable, Callable, Dict
+
+from loadtest.client import LoadClient
+from loadtest.dataset import Dataset
+
+PAGE_SIZE = 20
+
+# Default weights of the "mixed" scenario: mostly reads, some bills
+DEFAULT_MIX = {"browse_customers": 3, "browse_products": 5, "create_bill": 2}
+
+
+class ScenarioError(Exception):
+    """Raised when a scenario cannot run (e.g. there is no data to use)"""
+
+
+class Context:
+    """What one scenario iteration needs: the client, the ids and options"""
+
+    def __init__(
+        self,
+        client: LoadClient,
+        dataset: Dataset,
+        rng: random.Random,
+        bill_items: int = 3,
+    ):
+        self.client = client
+        self.dataset = dataset
+        self.rng = rng
+        self.bill_items = bill_items
+
+
+Scenario = Callable[[Context], Awaitable[None]]
+
+
+async def browse_customers(ctx: Context):
+    """List a page of customers, then open one of them"""
+    customer_ids = _require(ctx.dataset.customer_ids, "customers")
+    url = f"{ctx.client.targets.customers}/api/customers"
+    await ctx.client.call(
+        "GET /api/customers",
+        "GET",
+        url,
+        params={"skip": ctx.rng.randrange(len(customer_ids)), "limit": PAGE_SIZE},
+    )
+    await ctx.client.call(
+        "GET /api/customers/{customer_id}",
+        "GET",
+        f"{url}/{ctx.rng.choice(customer_ids)}",
+    )
+
+
+async def browse_products(ctx: Context):
+    """List a page of products, then open one of them"""
+    product_ids = _require(ctx.dataset.product_ids, "products")
+    url = f"{ctx.client.targets.products}/api/products"
+    await ctx.client.call(
+        "GET /api/products",
+        "GET",
+        f"{url}/",
+        params={"skip": ctx.rng.randrange(len(product_ids)), "limit": PAGE_SIZE},
+    )
+    await ctx.client.call(
+        "GET /api/products/{product_id}",
+        "GET",
+        f"{url}/{ctx.rng.choice(product_ids)}",
+    )
+
+
+async def create_bill(ctx: Context):
+    """Bill a random customer for `bill_items` distinct random products"""
+    customer_ids = _require(ctx.dataset.customer_ids, "customers")
+    product_ids = _require(ctx.dataset.product_ids, "products")
+    count = min(ctx.bill_items, len(product_ids))
+    await ctx.client.call(
+        "POST /api/bills",
+        "POST",
+        f"{ctx.client.targets.bills}/api/bills",
+        json={
+            "customer_id": ctx.rng.choice(customer_ids),
+            "items": [
+                {"product_id": product_id, "quantity": 1}
+                for product_id in ctx.rng.sample(product_ids, count)
+            ],
+        },
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "browse_customers": browse_customers,
+    "browse_products": browse_products,
+    "create_bill": create_bill,
+}
+
+
+def mixed(weights: Dict[str, float]) -> Scenario:
+    """A scenario running one of the named scenarios per iteration, by weight"""
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise ScenarioError(f"Unknown scenarios in mix: {', '.join(sorted(unknown))}")
+    names = list(weights)
+    cumulative = []
+    total = 0.0
+    for name in names:
+        total += weights[name]
+        cumulative.append(total)
+    if total <= 0:
+        raise ScenarioError("Mix weights must add up to more than zero")
+
+    async def run(ctx: Context):
+        (name,) = ctx.rng.choices(names, cum_weights=cumulative)
+        await SCENARIOS[name](ctx)
+
+    return run
+
+
+def get_scenario(name: str, mix: Dict[str, float] = DEFAULT_MIX) -> Scenario:
+    if name == "mixed":
+        return mixed(mix)
+    if name not in SCENARIOS:
+        raise ScenarioError(f"Unknown scenario: {name}")
+    return SCENARIOS[name]
+
+
+def _require(ids, what: str):
+    if not ids:
+        raise ScenarioError(f"No {what} available; seed some before the run")
+    return ids
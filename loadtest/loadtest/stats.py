@@ -0,0 +1,102 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    The q-th percentile (0-100) of already sorted values, linearly
+    interpolated between the two closest ranks.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        rank - lower
+    )
+
+
+class EndpointStats:
+    """Latency samples and outcomes of the requests sent to one endpoint"""
+
+    def __init__(self):
+        self.latencies: List[float] = []  # Seconds
+        self.errors = 0
+        self.outcomes: Counter = Counter()  # Status code or exception name
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": _ms(percentile(latencies, 50)),
+                "p95": _ms(percentile(latencies, 95)),
+                "p99": _ms(percentile(latencies, 99)),
+                "mean": _ms(sum(latencies) / count if count else 0.0),
+                "max": _ms(latencies[-1] if latencies else 0.0),
+            },
+            "outcomes": dict(sorted(self.outcomes.items())),
+        }
+
+
+class Recorder:
+    """
+    Collects every request of a run, keyed by endpoint template
+    (e.g. "GET /api/customers/{customer_id}") so ids do not split the stats.
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.iterations = 0
+        self.failed_iterations: Counter = Counter()  # By error message
+        self.dropped = 0  # Open loop: iterations skipped at `max_in_flight`
+        self.max_schedule_lag = 0.0  # Open loop: worst late start, in seconds
+
+    def record(
+        self,
+        endpoint: str,
+        latency: float,
+        status_code: Optional[int] = None,
+        error: Optional[str] = None,
+    ):
+        """Record one request; 4xx/5xx responses and exceptions are errors"""
+        stats = self.endpoints[endpoint]
+        stats.latencies.append(latency)
+        if error is not None:
+            stats.errors += 1
+            stats.outcomes[error] += 1
+        else:
+            stats.outcomes[str(status_code)] += 1
+            if status_code >= 400:
+                stats.errors += 1
+
+    def report(self, elapsed: float) -> dict:
+        """Per-endpoint and overall latency percentiles, throughput and errors"""
+        overall = EndpointStats()
+        for stats in self.endpoints.values():
+            overall.latencies.extend(stats.latencies)
+            overall.errors += stats.errors
+            overall.outcomes.update(stats.outcomes)
+
+        return {
+            "duration_s": round(elapsed, 3),
+            "iterations": self.iterations,
+            "failed_iterations": sum(self.failed_iterations.values()),
+            "iteration_errors": dict(self.failed_iterations.most_common(10)),
+            "dropped_iterations": self.dropped,
+            "max_schedule_lag_ms": _ms(self.max_schedule_lag),
+            "overall": overall.summary(elapsed),
+            "endpoints": {
+                endpoint: stats.summary(elapsed)
+                for endpoint, stats in sorted(self.endpoints.items())
+            },
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+
+from loadtest.client import LoadClient, Targets
+from loadtest.dataset import Dataset, load_dataset
+from loadtest.runner import run_closed_loop, run_open_loop
+from loadtest.scenarios import Context, get_scenario
+from loadtest.stats import Recorder
+
+
+class FakeServices:
+    """In-process stand-in for the three services behind one gateway"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if request.method == "POST" and request.url.path == "/api/bills":
+            return httpx.Response(201, json={"id": 1})
+        if request.url.path.startswith("/api/customers/"):
+            return httpx.Response(200, json={"id": 1})
+        if request.url.path.startswith("/api/products/"):
+            return httpx.Response(200, json={"id": 1})
+        return httpx.Response(200, json=[])
+
+
+@pytest.fixture
+def context():
+    def build(services: FakeServices) -> Context:
+        http = httpx.AsyncClient(transport=httpx.MockTransport(services))
+        client = LoadClient(http, Targets("http://gateway"), Recorder())
+        return Context(
+            client, Dataset([1, 2, 3], [10, 20, 30, 40]), random.Random(7), 3
+        )
+
+    return build
+
+
+async def test_closed_loop_mixed_scenario_hits_every_endpoint(context):
+    services = FakeServices(delay=0.001)
+    ctx = context(services)
+
+    elapsed = await run_closed_loop(get_scenario("mixed"), ctx, 4, duration=0.2)
+
+    report = ctx.client.recorder.report(elapsed)
+    assert set(report["endpoints"]) == {
+        "GET /api/customers",
+        "GET /api/customers/{customer_id}",
+        "GET /api/products",
+        "GET /api/products/{product_id}",
+        "POST /api/bills",
+    }
+    assert report["overall"]["errors"] == 0
+    assert report["overall"]["requests"] == len(services.requests)
+
+    bill = next(r for r in services.requests if r.url.path == "/api/bills")
+    items = json.loads(bill.content)["items"]
+    assert len({item["product_id"] for item in items}) == 3
+
+
+async def test_open_loop_keeps_its_rate_when_responses_are_slow(context):
+    # Each iteration takes longer than the interval between starts
+    ctx = context(FakeServices(delay=0.05))
+
+    await run_open_loop(get_scenario("create_bill"), ctx, rate=100, duration=0.2)
+
+    recorder = ctx.client.recorder
+    assert recorder.iterations == 20
+    assert recorder.dropped == 0
+    assert len(recorder.endpoints["POST /api/bills"].latencies) == 20
+
+
+async def test_open_loop_drops_iterations_beyond_max_in_flight(context):
+    ctx = context(FakeServices(delay=0.5))
+
+    await run_open_loop(
+        get_scenario("create_bill"), ctx, rate=100, duration=0.1, max_in_flight=4
+    )
+
+    assert ctx.client.recorder.iterations == 4
+    assert ctx.client.recorder.dropped == 6
+
+
+async def test_failed_requests_and_iterations_are_reported(context):
+    ctx = context(FakeServices())
+    ctx.dataset.customer_ids = []
+
+    async def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    ctx.client.http = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+    await run_closed_loop(get_scenario("browse_products"), ctx, 1, duration=0.05)
+    await run_closed_loop(get_scenario("browse_customers"), ctx, 1, duration=0.05)
+
+    report = ctx.client.recorder.report(0.1)
+    products = report["endpoints"]["GET /api/products"]
+    assert products["errors"] == products["requests"] > 0
+    assert set(products["outcomes"]) == {"ConnectError"}
+    assert report["failed_iterations"] > 0
+    assert list(report["iteration_errors"]) == [
+        "ScenarioError: No customers available; seed some before the run"
+    ]
+
+
+async def test_load_dataset_seeds_and_follows_cursors():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/bulk"):
+            return httpx.Response(200, json={})
+        if request.url.path == "/api/customers":
+            if "cursor" in request.url.params:
+                return httpx.Response(200, json=[{"id": 3}])
+            return httpx.Response(
+                200, json=[{"id": 1}, {"id": 2}], headers={"X-Next-Cursor": "c1"}
+            )
+        return httpx.Response(200, json=[{"id": 10}])
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    dataset = await load_dataset(
+        http, Targets("http://gateway"), seed_customers=2, seed_products=3
+    )
+
+    assert dataset.customer_ids == [1, 2, 3]
+    assert dataset.product_ids == [10]
+    seeded_products = json.loads(requests[1].content)
+    assert [row["sku"] for row in seeded_products] == [
+        "LOADTEST-0",
+        "LOADTEST-1",
+        "LOADTEST-2",
+    ]
@@ -0,0 +1,35 @@
+from loadtest.stats import Recorder, percentile
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [0.1, 0.2, 0.3, 0.4]
+
+    assert percentile(values, 0) == 0.1
+    assert percentile(values, 50) == 0.25
+    assert percentile(values, 100) == 0.4
+    assert percentile([], 99) == 0.0
+
+
+def test_report_groups_requests_by_endpoint():
+    recorder = Recorder()
+    for latency in (0.010, 0.020, 0.030):
+        recorder.record("GET /api/products/{product_id}", latency, status_code=200)
+    recorder.record("POST /api/bills", 0.100, status_code=201)
+    recorder.record("POST /api/bills", 0.300, status_code=503)
+    recorder.record("POST /api/bills", 2.000, error="ReadTimeout")
+
+    report = recorder.report(elapsed=2.0)
+
+    products = report["endpoints"]["GET /api/products/{product_id}"]
+    assert products["requests"] == 3
+    assert products["errors"] == 0
+    assert products["throughput_rps"] == 1.5
+    assert products["latency_ms"]["p50"] == 20.0
+
+    bills = report["endpoints"]["POST /api/bills"]
+    assert bills["errors"] == 2
+    assert bills["outcomes"] == {"201": 1, "503": 1, "ReadTimeout": 1}
+    assert bills["latency_ms"]["max"] == 2000.0
+
+    assert report["overall"]["requests"] == 6
+    assert report["overall"]["errors"] == 2